@@ -1,3 +1,14 @@
+import argparse
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+INPUT_PATH = Path(__file__).resolve().parent / 'input.txt'
+
+
 # Fuel required to launch a given module is based on its mass. 
 # Specifically, to find the fuel required for a module, take its mass,
 # divide by three, round down, and subtract 2.
@@ -11,9 +22,6 @@ test_data = [
     [100756, 33583],
 ]
 
-for test in test_data:
-    assert calc_fuel(test[0]) == test[1]
-
 def load_lines(path):
     with open(path) as f:
         data = f.read()
@@ -25,11 +33,6 @@ def process_input(path):
     return [int(x) for x in raw_input]
 
 
-inputs = process_input('input_1.txt')
-result = sum(calc_fuel(x) for x in inputs)
-
-print('Fuel req: %s' % result)
-
 # * A module of mass 14 requires 2 fuel. This fuel requires no further fuel (2
 #   divided by 3 and rounded down is 0, which would call for a negative fuel),
 #   so the total fuel required is still just 2.
@@ -55,9 +58,71 @@ def calc_fuel_2(mass):
 
     return max(0, res + extra)
 
-assert calc_fuel_2(14) == 2
-assert calc_fuel_2(1969) == 966 
-assert calc_fuel_2(100756) == 50346
 
-result = sum(calc_fuel_2(x) for x in inputs)
-print('Fuel req 2: %s' % result)
+# Whole-manifest versions of the two above, returning fuel per module. With
+# NumPy they run as array operations; without it they fall back to the
+# scalar functions.
+def calc_fuel_batch(masses):
+    if np is None:
+        return [calc_fuel(mass) for mass in masses]
+
+    masses = np.asarray(masses, dtype=np.int64)
+    # int(mass / 3) truncates toward zero, unlike //, for negative masses.
+    return np.sign(masses) * (np.abs(masses) // 3) - 2
+
+
+def calc_fuel_2_batch(masses):
+    if np is None:
+        return [calc_fuel_2(mass) for mass in masses]
+
+    fuel = calc_fuel_batch(masses)
+    total = np.zeros_like(fuel)
+
+    # Apply the step to every module still needing fuel, dropping modules
+    # as their fuel reaches zero. Fuel stays positive from here on, so the
+    # plain floor division matches the scalar step.
+    active = np.flatnonzero(fuel > 0)
+    fuel = fuel[active]
+    while active.size:
+        total[active] += fuel
+        fuel = fuel // 3 - 2
+        remaining = fuel > 0
+        active = active[remaining]
+        fuel = fuel[remaining]
+    return total
+
+
+def total_fuel(fuel):
+    return int(fuel.sum()) if np is not None else sum(fuel)
+
+
+def check():
+    for test in test_data:
+        assert calc_fuel(test[0]) == test[1]
+
+    assert calc_fuel_2(14) == 2
+    assert calc_fuel_2(1969) == 966 
+    assert calc_fuel_2(100756) == 50346
+
+    masses = list(range(-50, 3000)) + [test[0] for test in test_data]
+    assert list(calc_fuel_batch(masses)) == [calc_fuel(mass) for mass in masses]
+    assert list(calc_fuel_2_batch(masses)) == [calc_fuel_2(mass) for mass in masses]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Day 1: fuel requirements')
+    parser.add_argument('input', nargs='?', default=INPUT_PATH)
+    args = parser.parse_args(argv)
+
+    check()
+    inputs = process_input(args.input)
+
+    result = total_fuel(calc_fuel_batch(inputs))
+    print('Fuel req: %s' % result)
+
+    result = total_fuel(calc_fuel_2_batch(inputs))
+    print('Fuel req 2: %s' % result)
+
+
+if __name__ == '__main__':
+    main()
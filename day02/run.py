@@ -1,80 +1,72 @@
+import argparse
+import sys
+from pathlib import Path
 from typing import List
 from pydantic import BaseModel
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-class Instruction(BaseModel):
-    opcode: int
-    address: int
+from intcode import (
+    Computer,
+    CowMemory,
+    MemoryEquals,
+    PagedMemory,
+    create_and_run,
+    load_program,
+    parse_opcodes,
+    run_symbolic,
+    search,
+    solve,
+)
 
-
-class TerminateInstruction(Instruction):
-    next_step = 1
-
-
-class ArithInstruction(Instruction):
-    noun: int
-    verb: int
-    output_address: int
-    next_step = 4
-
-    def assign_operate(self):
-        return RanInstruction(
-            instruction=self,
-            result=self.operate(),
-        )
-
-
-class AddInstruction(ArithInstruction):
-    def operate(self):
-        return self.noun + self.verb
-
-
-class MulInstruction(ArithInstruction):
-    def operate(self):
-        return self.noun * self.verb
-
-
-class RanInstruction(BaseModel):
-    instruction: Instruction
-    result: int
+INPUT_PATH = Path(__file__).resolve().parent / 'input.txt'
 
 
 class ComputedResult(BaseModel):
     memory: List[int]
-    history: List[RanInstruction]
+    history: List
 
 
 def run(memory) -> ComputedResult:
-    index = 0
+    computer = create_and_run(memory)
+    return ComputedResult(
+        memory=computer.memory.to_list(),
+        history=list(computer.history),
+    )
+
+
+def run_with(input_mem, noun, verb):
+    input_instance = input_mem[:]
+    input_instance[1] = noun
+    input_instance[2] = verb
+    return run(input_instance)
+
+
+def find_noun_verb(input_mem, target, processes=None):
+    # Add/multiply-only programs have a closed form for memory[0]; solve it
+    # directly and only fall back to running every pair when they don't.
+    domains = {'noun': range(100), 'verb': range(100)}
+    try:
+        expression = run_symbolic(input_mem, {1: 'noun', 2: 'verb'})[0]
+    except ValueError:
+        expression = None
+
+    if expression is not None:
+        solution = solve(expression, target, domains)
+        if solution is not None:
+            return 100 * solution['noun'] + solution['verb']
+        return None
+
+    match = search(
+        input_mem,
+        {1: domains['noun'], 2: domains['verb']},
+        MemoryEquals(0, target),
+        processes=processes,
+    )
+    if match is not None:
+        noun, verb = match
+        return 100 * noun + verb
 
-    keep_running = True
-    history = []
-    while keep_running:
-        opcode = memory[index]
-
-        if opcode == 1 or opcode == 2:
-            loc_1, loc_2, loc_3 = memory[index+1:index+4]
-
-            instructionType = AddInstruction if opcode == 1 else MulInstruction
-            instruct = instructionType(
-                opcode=1,
-                address=index,
-                noun=memory[loc_1],
-                verb=memory[loc_2],
-                output_address=loc_3,
-            )
-
-            instructed = instruct.assign_operate()
-            memory[instructed.instruction.output_address] = instructed.result
-
-        elif opcode == 99:
-            instruct = TerminateInstruction(opcode=opcode, address=index)
-            keep_running = False
-
-        index += instruct.next_step
-        history.append(instructed)
-
-    return ComputedResult(memory=memory, history=history)
 
 # 1,0,0,0,99 becomes 2,0,0,0,99 (1 + 1 = 2).
 # 2,3,0,3,99 becomes 2,3,0,6,99 (3 * 2 = 6).
@@ -86,37 +78,47 @@ test_2 = [2, 3, 0, 3, 99]
 test_3 = [2, 4, 4, 5, 99, 0]
 test_4 = [1, 1, 1, 4, 99, 5, 6, 0, 99]
 
-assert run(test_1).memory == [2, 0, 0, 0, 99]
-assert run(test_2).memory == [2, 3, 0, 6, 99]
-assert run(test_3).memory == [2, 4, 4, 5, 99, 9801]
-assert run(test_4).memory == [30, 1, 1, 4, 2, 5, 6, 0, 99]
 
-def parse_opcodes(input_str):
-    return [int(x) for x in input_str.strip().split(',')]
+def check():
+    assert run(test_1).memory == [2, 0, 0, 0, 99]
+    assert run(test_2).memory == [2, 3, 0, 6, 99]
+    assert run(test_3).memory == [2, 4, 4, 5, 99, 9801]
+    assert run(test_4).memory == [30, 1, 1, 4, 2, 5, 6, 0, 99]
+
+    assert run(parse_opcodes('1,0,0,0,99\n')).memory == [2, 0, 0, 0, 99]
+    assert run(parse_opcodes('2,3,0,3,99\n')).memory == [2, 3, 0, 6, 99]
+    assert run(parse_opcodes('2,4,4,5,99,0\n')).memory == [2, 4, 4, 5, 99, 9801]
+    assert run(parse_opcodes('1,1,1,4,99,5,6,0,99\n')).memory == [30, 1, 1, 4, 2, 5, 6, 0, 99]
+
+    # Translated, writes over already-run operands keep the block going and
+    # writes ahead of it finish on the interpreter: same memory either way.
+    for program in [test_1, test_2, test_3, test_4, [1, 9, 10, 7, 1, 1, 1, 0, 99, 3, 98]]:
+        translated = Computer(memory=program, translate=True)
+        translated.run()
+        assert translated.memory == run(program).memory
+
+    # search() takes a memory backend as well as a list, and leaves it as
+    # it was: only mem[4] (99) plus mem[0] (1) makes 100.
+    for program in [test_1, PagedMemory(test_1), CowMemory(test_1)]:
+        assert list(program) == test_1
+        assert search(program, {1: range(5)}, MemoryEquals(0, 100), processes=0) == (4,)
+        assert list(program) == test_1
+
 
-assert run(parse_opcodes('1,0,0,0,99\n')).memory == [2, 0, 0, 0, 99]
-assert run(parse_opcodes('2,3,0,3,99\n')).memory == [2, 3, 0, 6, 99]
-assert run(parse_opcodes('2,4,4,5,99,0\n')).memory == [2, 4, 4, 5, 99, 9801]
-assert run(parse_opcodes('1,1,1,4,99,5,6,0,99\n')).memory == [30, 1, 1, 4, 2, 5, 6, 0, 99]
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Day 2: 1202 program alarm')
+    parser.add_argument('input', nargs='?', default=INPUT_PATH)
+    parser.add_argument('--target', type=int, default=19690720)
+    args = parser.parse_args(argv)
 
-with open('input.txt') as f:
-    input_mem = parse_opcodes(f.read())
+    check()
+    input_mem = load_program(args.input)
 
-input_mem[1] = 12
-input_mem[2] = 2
+    results = run_with(input_mem, 12, 2)
+    print("Memory at 0: %s" % results.memory[0])
 
-results = run(input_mem[:])
-print("Memory at 0: %s" % results.memory[0])
+    print('Part 2 %s' % find_noun_verb(input_mem, args.target))
 
-for noun in range(99):
-    for verb in range(99):
-        input_instance = input_mem[:]
-        input_instance[1] = noun
-        input_instance[2] = verb
 
-        results = run(input_instance)
-        if results.memory[0] == 19690720:
-            # what_i_want = 
-            print('Part 2 %s' % (
-                100 * noun + verb
-            ))
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,12 @@
 # R98,U47,R26,D63,R33,U87,L62,D20,R33,U53,R51
 # U98,R91,D20,R16,D67,R40,U7,R15,U6,R7 = distance 135
 
+import argparse
+from pathlib import Path
+
+INPUT_PATH = Path(__file__).resolve().parent / 'input.txt'
+
+
 class WireVector:
     def __init__(self, direction, length):
         self.direction = direction
@@ -75,32 +81,44 @@ def calculate_closest_cross(route_1, route_2):
     return min(steps)
 
 
-
 test_1_r1 = "R75,D30,R83,U83,L12,D49,R71,U7,L72"
 test_1_r2 = "U62,R66,U55,R34,D71,R55,D58,R83"
 test_2_r1 = "R98,U47,R26,D63,R33,U87,L62,D20,R33,U53,R51"
 test_2_r2 = "U98,R91,D20,R16,D67,R40,U7,R15,U6,R7"
 
-assert WireVector('U', 2).get_journey((0,0)) == [(0,1), (0,2)]
-assert WireVector('R', 4).get_journey((2,3)) == [(3,3), (4,3), (5,3), (6,3)]
-assert WireVector('L', 3).get_journey((-2,2)) == [(-3,2), (-4,2), (-5,2)]
-assert WireVector('D', 1).get_journey((0,7)) == [(0,6)]
 
-assert len(parse_route(test_1_r1)) == 9
-assert parse_route(test_1_r2)[-1].length == 83
-assert parse_route(test_2_r1)[-2].direction == 'U'
+def check():
+    assert WireVector('U', 2).get_journey((0,0)) == [(0,1), (0,2)]
+    assert WireVector('R', 4).get_journey((2,3)) == [(3,3), (4,3), (5,3), (6,3)]
+    assert WireVector('L', 3).get_journey((-2,2)) == [(-3,2), (-4,2), (-5,2)]
+    assert WireVector('D', 1).get_journey((0,7)) == [(0,6)]
+
+    assert len(parse_route(test_1_r1)) == 9
+    assert parse_route(test_1_r2)[-1].length == 83
+    assert parse_route(test_2_r1)[-2].direction == 'U'
+
+    assert calculate_minimum_cross(parse_route(test_1_r1), parse_route(test_1_r2)) == 159
+    assert calculate_minimum_cross(parse_route(test_2_r1), parse_route(test_2_r2)) == 135
+
+    assert calculate_closest_cross(parse_route(test_1_r1), parse_route(test_1_r2)) == 610
+    assert calculate_closest_cross(parse_route(test_2_r1), parse_route(test_2_r2)) == 410
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Day 3: crossed wires')
+    parser.add_argument('input', nargs='?', default=INPUT_PATH)
+    args = parser.parse_args(argv)
 
-assert calculate_minimum_cross(parse_route(test_1_r1), parse_route(test_1_r2)) == 159
-assert calculate_minimum_cross(parse_route(test_2_r1), parse_route(test_2_r2)) == 135
+    check()
+    with open(args.input) as f:
+        route_1, route2 = parse_routes(f.read())
 
-with open('input.txt') as f:
-    route_1, route2 = parse_routes(f.read())
+    result = calculate_minimum_cross(route_1, route2)
+    print('Minimum cross distance %s' % result)
 
-result = calculate_minimum_cross(route_1, route2)
-print('Minimum cross distance %s' % result)
+    result = calculate_closest_cross(route_1, route2)
+    print('Minimum steps distance %s' % result)
 
-assert calculate_closest_cross(parse_route(test_1_r1), parse_route(test_1_r2)) == 610
-assert calculate_closest_cross(parse_route(test_2_r1), parse_route(test_2_r2)) == 410
 
-result = calculate_closest_cross(route_1, route2)
-print('Minimum steps distance %s' % result)
+if __name__ == '__main__':
+    main()
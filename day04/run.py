@@ -7,6 +7,10 @@
 
 # Your puzzle input is 178416-676461.
 
+import argparse
+
+PUZZLE_RANGE = (178416, 676461)
+
 def matches(selection):
     groups = []
     growing = True
@@ -43,17 +47,30 @@ def find_matches(range_from, range_to, operation):
         if operation(parse(str(x)))
     ]
 
-assert parse('111111') == [1, 1, 1, 1, 1, 1]
-assert parse('223450') == [2, 2, 3, 4, 5, 0]
-assert parse('123789') == [1, 2, 3, 7, 8, 9]
-assert matches(parse('111111'))
-assert not matches(parse('223450'))
-assert not matches(parse('123789'))
 
-print('Found: %s' % len(find_matches(178416, 676461, matches)))
+def check():
+    assert parse('111111') == [1, 1, 1, 1, 1, 1]
+    assert parse('223450') == [2, 2, 3, 4, 5, 0]
+    assert parse('123789') == [1, 2, 3, 7, 8, 9]
+    assert matches(parse('111111'))
+    assert not matches(parse('223450'))
+    assert not matches(parse('123789'))
+
+    assert matches2(parse('112233'))
+    assert not matches2(parse('123444'))
+    assert matches2(parse('111122'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Day 4: secure container')
+    parser.add_argument('range_from', nargs='?', type=int, default=PUZZLE_RANGE[0])
+    parser.add_argument('range_to', nargs='?', type=int, default=PUZZLE_RANGE[1])
+    args = parser.parse_args(argv)
+
+    check()
+    print('Found: %s' % len(find_matches(args.range_from, args.range_to, matches)))
+    print('Found 2: %s' % len(find_matches(args.range_from, args.range_to, matches2)))
 
-assert matches2(parse('112233'))
-assert not matches2(parse('123444'))
-assert matches2(parse('111122'))
 
-print('Found 2: %s' % len(find_matches(178416, 676461, matches2)))
+if __name__ == '__main__':
+    main()
@@ -1,232 +1,20 @@
-from typing import List
-from pydantic import BaseModel
+import argparse
+import sys
+from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-class Instruction(BaseModel):
-    opcode: int
-    address: int
+from intcode import (
+    Computer,
+    RingHistory,
+    create_and_run,
+    get_codes,
+    load_program,
+    parse_opcodes,
+)
 
-    def assign_operate(self):
-        return RanInstruction(
-            instruction=self,
-            result=0,
-        )
+INPUT_PATH = Path(__file__).resolve().parent / 'input.txt'
 
-    def get_next_index(self, old_index):
-        return old_index + self.next_step
-
-class TerminateInstruction(Instruction):
-    next_step = 1
-
-
-class IOInstruction(Instruction):
-    next_step = 2
-
-
-class InputInstruction(IOInstruction):
-    save_address: int
-    input_val: int
-
-
-class OutputInstruction(IOInstruction):
-    output_value: int
-
-
-class ArithInstruction(Instruction):
-    noun: int
-    verb: int
-    output_address: int
-    next_step = 4
-
-    def assign_operate(self):
-        return RanInstruction(
-            instruction=self,
-            result=self.operate(),
-        )
-
-
-class AddInstruction(ArithInstruction):
-    def operate(self):
-        return self.noun + self.verb
-
-
-class MulInstruction(ArithInstruction):
-    def operate(self):
-        return self.noun * self.verb
-
-
-class LessThanInstruction(ArithInstruction):
-    def operate(self):
-        return int(self.noun < self.verb)
-
-
-class EqualsInstruction(ArithInstruction):
-    def operate(self):
-        return int(self.noun == self.verb)
-
-
-class JumpInstruction(Instruction):
-    condition: int
-    jump_address: int
-    next_step = 3
-
-    def get_next_index(self, old_index):
-        if self.condition_passes():
-            return self.jump_address
-        else:
-            return super().get_next_index(old_index)
-
-
-class JumpIfTrueInstruction(JumpInstruction):
-    def condition_passes(self):
-        return bool(self.condition)
-
-
-class JumpIfFalseInstruction(JumpInstruction):
-    def condition_passes(self):
-        return not bool(self.condition)
-
-
-class RanInstruction(BaseModel):
-    instruction: Instruction
-    result: int
-
-
-class Computer(BaseModel):
-    memory: List[int]
-    history: List[RanInstruction]=[]
-    inputs: List=[]
-    outputs: List=[]
-
-    def get_var(self, var, param_mode):
-        if param_mode:
-            return var
-        else:
-            return self.memory[var]
-
-
-def get_codes(instruction_code):
-    opcode = instruction_code % 100
-    param_mode_1 = bool(instruction_code % 1000 - (instruction_code % 100))
-    param_mode_2 = bool(instruction_code % 10000 - (instruction_code % 1000))
-    param_mode_3 = bool(instruction_code % 100000 - (instruction_code % 10000))
-
-    return opcode, param_mode_1, param_mode_2, param_mode_3
-
-
-def run(computer: Computer):
-    index = 0
-
-    keep_running = True
-    instructionMap = {
-        1: AddInstruction,
-        2: MulInstruction,
-        3: InputInstruction,
-        4: OutputInstruction,
-        5: JumpIfTrueInstruction,
-        6: JumpIfFalseInstruction,
-        7: LessThanInstruction,
-        8: EqualsInstruction,
-        99: TerminateInstruction,
-    }
-
-    arith_instructions = [
-        AddInstruction,
-        MulInstruction,
-        LessThanInstruction,
-        EqualsInstruction
-    ]
-
-    io_instructions = [
-        InputInstruction,
-        OutputInstruction,
-    ]
-
-    jmp_instructions = [
-        JumpIfTrueInstruction,
-        JumpIfFalseInstruction,
-    ]
-
-    while keep_running:
-        opcode, pm_1, pm_2, pm_3 = get_codes(computer.memory[index])
-        instructionType = instructionMap[opcode]
-
-        if instructionType in arith_instructions:
-            loc_1, loc_2, loc_3 = computer.memory[index+1:index+4]
-
-            var_1 = computer.get_var(loc_1, pm_1)
-            var_2 = computer.get_var(loc_2, pm_2)
-
-            instruct = instructionType(
-                opcode=opcode,
-                address=index,
-                noun=var_1,
-                verb=var_2,
-                output_address=loc_3,
-            )
-
-            instructed = instruct.assign_operate()
-            computer.memory[instructed.instruction.output_address] = instructed.result
-
-        elif instructionType in io_instructions:
-            loc_1 = computer.memory[index+1]
-            var_1 = computer.get_var(loc_1, pm_1)
-
-            if instructionType == InputInstruction:
-                value = computer.inputs.pop()
-                instruct = InputInstruction(
-                    opcode=opcode,
-                    address=index,
-                    save_address=loc_1,
-                    input_val=value
-                )
-                computer.memory[instruct.save_address] = value
-            else:
-                instruct = OutputInstruction(
-                    opcode=opcode,
-                    address=index,
-                    output_value=var_1,
-                )
-                computer.outputs.append(instruct.output_value)
-
-            instructed = instruct.assign_operate()
-
-        elif instructionType in jmp_instructions:
-            loc_1, loc_2 = computer.memory[index+1:index+3]
-
-            var_1 = computer.get_var(loc_1, pm_1)
-            var_2 = computer.get_var(loc_2, pm_2)
-
-            instruct = instructionType(
-                opcode=opcode,
-                address=index,
-                condition=var_1,
-                jump_address=var_2,
-            )
-
-            instructed = instruct.assign_operate()
-
-        elif opcode == 99:
-            instruct = TerminateInstruction(opcode=opcode, address=index)
-            keep_running = False
-            instructed = instruct.assign_operate()
-
-        index = instruct.get_next_index(index)
-        computer.history.append(instructed)
-
-    return computer
-
-def parse_opcodes(input_str):
-    return [int(x) for x in input_str.strip().split(',')]
-
-print(get_codes(1002))
-assert get_codes(1002) == (2, 0, 1, 0)
-
-assert run(Computer(memory=parse_opcodes('1002,4,3,4,33\n'))).memory == [1002, 4, 3, 4, 99]
-
-test_io = run(Computer(memory=parse_opcodes('3,0,4,0,99\n'), inputs=[76]))
-assert test_io.inputs == []
-assert test_io.outputs == [76]
 
 test_mems = {
     'mem1': parse_opcodes('3,9,8,9,10,9,4,9,99,-1,8\n'),
@@ -238,7 +26,8 @@ test_mems = {
     'mem7': parse_opcodes('3,21,1008,21,8,20,1005,20,22,107,8,21,20,1006,20,31,1106,0,36,98,0,0,1002,21,125,20,4,20,1105,1,46,104,999,1105,1,46,1101,1000,1,20,4,20,1105,1,46,98,99\n'),
 }
 
-for test_mem, tests in [
+
+test_cases = [
     ['mem1', [
         [6, 0],
         [7, 0],
@@ -276,28 +65,76 @@ for test_mem, tests in [
         [8, 1000],
         [9, 1001],
     ]],
-]:
-    for test_input, test_output in tests:
-        print('Running test: %s %s %s' % (test_mem, test_input, test_output))
-        test_memory = test_mems[test_mem].copy()
-        mem_before = test_memory.copy()
-        try:
-            test_computer = run(Computer(
+]
+
+
+def check():
+    print(get_codes(1002))
+    assert get_codes(1002) == (2, 0, 1, 0)
+
+    assert create_and_run(parse_opcodes('1002,4,3,4,33\n')).memory == [1002, 4, 3, 4, 99]
+
+    test_io = create_and_run(parse_opcodes('3,0,4,0,99\n'), [76])
+    assert test_io.inputs == []
+    assert test_io.outputs == [76]
+
+    # An input that suspends the run is recorded once, when it completes.
+    resumed = Computer(memory=parse_opcodes('3,0,4,0,99\n'), history=RingHistory(20))
+    resumed.run()
+    resumed.inputs.append(76)
+    resumed.run()
+    assert [index for index, _ in resumed.history] == [0, 2, 4]
+
+    for test_mem, tests in test_cases:
+        for test_input, test_output in tests:
+            print('Running test: %s %s %s' % (test_mem, test_input, test_output))
+            test_memory = test_mems[test_mem].copy()
+            mem_before = test_memory.copy()
+            test_computer = Computer(
                 memory=test_memory,
                 inputs=[test_input],
-            ))
-        except:
-            print('Memory before: %s' % mem_before)
-            print('History: %s' % test_computer.history)
-            print('Memory after: %s' % test_computer.memory)
+                history=RingHistory(20),
+            )
+            try:
+                test_computer.run()
+            except:
+                print('Memory before: %s' % mem_before)
+                print('History: %s' % test_computer.history)
+                print('Memory after: %s' % test_computer.memory)
+                raise
+
+            print('Test result: %s' % list(test_computer.outputs))
+            assert test_computer.outputs == [test_output]
+
+            # The same through the translation tier (history would turn it off).
+            translated = Computer(
+                memory=test_mems[test_mem].copy(),
+                inputs=[test_input],
+                translate=True,
+            )
+            translated.run()
+            assert translated.outputs == [test_output]
+
+    # 33 isn't an instruction until the program writes 99 over it.
+    patched = Computer(memory=parse_opcodes('1002,4,3,4,33\n'), translate=True)
+    patched.run()
+    assert patched.memory == [1002, 4, 3, 4, 99]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Day 5: thermal diagnostics')
+    parser.add_argument('input', nargs='?', default=INPUT_PATH)
+    args = parser.parse_args(argv)
+
+    check()
+    input_mem = load_program(args.input)
+
+    comp = create_and_run(input_mem, [1])
+    print(list(comp.outputs))
 
-        print('Test result: %s' % test_computer.outputs)
-        assert test_computer.outputs == [test_output]
+    comp = create_and_run(input_mem, [5])
+    print(list(comp.outputs))
 
-with open('input.txt') as f:
-    input_mem = parse_opcodes(f.read())
-comp = run(Computer(memory=input_mem.copy(), inputs=[1]))
-print(comp.outputs)
 
-comp = run(Computer(memory=input_mem.copy(), inputs=[5]))
-print(comp.outputs)
+if __name__ == '__main__':
+    main()
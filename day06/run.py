@@ -1,6 +1,11 @@
+import argparse
+from pathlib import Path
 from typing import List, Optional
 from pydantic import BaseModel
 
+HERE = Path(__file__).resolve().parent
+INPUT_PATH = HERE / 'input.txt'
+
 
 class ParsedOrbit(BaseModel):
     parent: str
@@ -51,19 +56,9 @@ def find_total_orbits(orbits):
     return calc_orbit(orbits, 'COM', 0)
 
 
-
-with open('test_orbits.txt') as f:
-    input_orbits = parse(f.read())
-
-
-bodies = get_bodies(input_orbits)
-assert find_total_orbits(bodies) == 42
-
-
-with open('input.txt') as f:
-    input_orbits = parse(f.read())
-bodies = get_bodies(input_orbits)
-print('Found orbits: %s' % find_total_orbits(bodies))
+def load_bodies(path):
+    with open(path) as f:
+        return get_bodies(parse(f.read()))
 
 
 def find_orbit_path_to_centre(bodies, body):
@@ -103,20 +98,30 @@ def find_orbit_path_length(bodies):
 
     return index_Y + index_S
 
-with open('test_part2.txt') as f:
-    input_orbits = parse(f.read())
 
-# import pdb; pdb.set_trace()
-bodies = get_bodies(input_orbits)
+def check():
+    bodies = load_bodies(HERE / 'test_orbits.txt')
+    assert find_total_orbits(bodies) == 42
+
+    bodies = load_bodies(HERE / 'test_part2.txt')
+    closest_you = find_orbit_path_to_centre(bodies, "YOU")
+    closest_san = find_orbit_path_to_centre(bodies, "SAN")
+    assert closest_you == ['K', 'J', 'E', 'D', 'C', 'B', 'COM']
+    assert closest_san == ['I', 'D', 'C', 'B', 'COM']
+    assert closet_join(closest_you, closest_san) == 'D'
+    assert find_orbit_path_length(bodies) == 4
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Day 6: universal orbit map')
+    parser.add_argument('input', nargs='?', default=INPUT_PATH)
+    args = parser.parse_args(argv)
+
+    check()
+    bodies = load_bodies(args.input)
+    print('Found orbits: %s' % find_total_orbits(bodies))
+    print('Found orbits: %s' % find_orbit_path_length(bodies))
 
-closest_you = find_orbit_path_to_centre(bodies, "YOU")
-closest_san = find_orbit_path_to_centre(bodies, "SAN")
-assert closest_you == ['K', 'J', 'E', 'D', 'C', 'B', 'COM']
-assert closest_san == ['I', 'D', 'C', 'B', 'COM']
-assert closet_join(closest_you, closest_san) == 'D'
-assert find_orbit_path_length(bodies) == 4
 
-with open('input.txt') as f:
-    input_orbits = parse(f.read())
-bodies = get_bodies(input_orbits)
-print('Found orbits: %s' % find_orbit_path_length(bodies))
+if __name__ == '__main__':
+    main()
@@ -1,230 +1,25 @@
-from typing import List
-from pydantic import BaseModel
+import argparse
+import asyncio
 import itertools
+import sys
+from pathlib import Path
 
-class Instruction(BaseModel):
-    opcode: int
-    address: int
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-    def assign_operate(self):
-        return RanInstruction(
-            instruction=self,
-            result=0,
-        )
+from intcode import (
+    DEADLOCKED,
+    HALTED,
+    Channel,
+    Computer,
+    CowMemory,
+    Scheduler,
+    Tee,
+    connect,
+    load_program,
+    parse_opcodes,
+)
 
-    def get_next_index(self, old_index):
-        return old_index + self.next_step
-
-class TerminateInstruction(Instruction):
-    next_step = 1
-
-
-class IOInstruction(Instruction):
-    next_step = 2
-
-
-class InputInstruction(IOInstruction):
-    save_address: int
-    input_val: int
-
-
-class OutputInstruction(IOInstruction):
-    output_value: int
-
-
-class ArithInstruction(Instruction):
-    noun: int
-    verb: int
-    output_address: int
-    next_step = 4
-
-    def assign_operate(self):
-        return RanInstruction(
-            instruction=self,
-            result=self.operate(),
-        )
-
-
-class AddInstruction(ArithInstruction):
-    def operate(self):
-        return self.noun + self.verb
-
-
-class MulInstruction(ArithInstruction):
-    def operate(self):
-        return self.noun * self.verb
-
-
-class LessThanInstruction(ArithInstruction):
-    def operate(self):
-        return int(self.noun < self.verb)
-
-
-class EqualsInstruction(ArithInstruction):
-    def operate(self):
-        return int(self.noun == self.verb)
-
-
-class JumpInstruction(Instruction):
-    condition: int
-    jump_address: int
-    next_step = 3
-
-    def get_next_index(self, old_index):
-        if self.condition_passes():
-            return self.jump_address
-        else:
-            return super().get_next_index(old_index)
-
-
-class JumpIfTrueInstruction(JumpInstruction):
-    def condition_passes(self):
-        return bool(self.condition)
-
-
-class JumpIfFalseInstruction(JumpInstruction):
-    def condition_passes(self):
-        return not bool(self.condition)
-
-
-class RanInstruction(BaseModel):
-    instruction: Instruction
-    result: int
-
-
-def get_codes(instruction_code):
-    opcode = instruction_code % 100
-    param_mode_1 = bool(instruction_code % 1000 - (instruction_code % 100))
-    param_mode_2 = bool(instruction_code % 10000 - (instruction_code % 1000))
-    param_mode_3 = bool(instruction_code % 100000 - (instruction_code % 10000))
-
-    return opcode, param_mode_1, param_mode_2, param_mode_3
-
-
-class Computer(BaseModel):
-    memory: List[int]
-    history: List[RanInstruction]=[]
-    inputs: List=[]
-    outputs: List=[]
-    index: int=0
-    terminated: bool=False
-
-    def get_var(self, var, param_mode):
-        if param_mode:
-            return var
-        else:
-            return self.memory[var]
-
-    def run(self):
-        # index = 0
-        # keep_running = True
-
-        instructionMap = {
-            1: AddInstruction,
-            2: MulInstruction,
-            3: InputInstruction,
-            4: OutputInstruction,
-            5: JumpIfTrueInstruction,
-            6: JumpIfFalseInstruction,
-            7: LessThanInstruction,
-            8: EqualsInstruction,
-            99: TerminateInstruction,
-        }
-
-        arith_instructions = [
-            AddInstruction,
-            MulInstruction,
-            LessThanInstruction,
-            EqualsInstruction
-        ]
-
-        io_instructions = [
-            InputInstruction,
-            OutputInstruction,
-        ]
-
-        jmp_instructions = [
-            JumpIfTrueInstruction,
-            JumpIfFalseInstruction,
-        ]
-
-        while not self.terminated:
-            opcode, pm_1, pm_2, pm_3 = get_codes(self.memory[self.index])
-            instructionType = instructionMap[opcode]
-
-            if instructionType in arith_instructions:
-                loc_1, loc_2, loc_3 = self.memory[self.index+1:self.index+4]
-
-                var_1 = self.get_var(loc_1, pm_1)
-                var_2 = self.get_var(loc_2, pm_2)
-
-                instruct = instructionType(
-                    opcode=opcode,
-                    address=self.index,
-                    noun=var_1,
-                    verb=var_2,
-                    output_address=loc_3,
-                )
-
-                instructed = instruct.assign_operate()
-                self.memory[instructed.instruction.output_address] = instructed.result
-
-            elif instructionType in io_instructions:
-                loc_1 = self.memory[self.index+1]
-                var_1 = self.get_var(loc_1, pm_1)
-
-                if instructionType == InputInstruction:
-                    if not self.inputs:
-                        return
-
-                    value = self.inputs.pop(0)
-                    instruct = InputInstruction(
-                        opcode=opcode,
-                        address=self.index,
-                        save_address=loc_1,
-                        input_val=value
-                    )
-                    self.memory[instruct.save_address] = value
-                else:
-                    instruct = OutputInstruction(
-                        opcode=opcode,
-                        address=self.index,
-                        output_value=var_1,
-                    )
-                    self.outputs.append(instruct.output_value)
-
-                instructed = instruct.assign_operate()
-
-            elif instructionType in jmp_instructions:
-                loc_1, loc_2 = self.memory[self.index+1:self.index+3]
-
-                var_1 = self.get_var(loc_1, pm_1)
-                var_2 = self.get_var(loc_2, pm_2)
-
-                instruct = instructionType(
-                    opcode=opcode,
-                    address=self.index,
-                    condition=var_1,
-                    jump_address=var_2,
-                )
-
-                instructed = instruct.assign_operate()
-
-            elif opcode == 99:
-                instruct = TerminateInstruction(
-                    opcode=opcode, address=self.index
-                )
-                self.terminated = True
-                instructed = instruct.assign_operate()
-
-            self.index = instruct.get_next_index(self.index)
-            self.history.append(instructed)
-
-        # return computer
-
-
-def parse_opcodes(input_str):
-    return [int(x) for x in input_str.strip().split(',')]
+INPUT_PATH = Path(__file__).resolve().parent / 'input.txt'
 
 
 # def run_amps(combo, source_mem):
@@ -239,56 +34,241 @@ def parse_opcodes(input_str):
 
 #     return next_sig
 
-def run_amps(combo, source_mem):
-    # def all_running 
-    next_sig = 0
-    computers = [Computer(memory=source_mem.copy(), inputs=[]) for x in range (5)]
-    for input_sig, computer in zip(combo, computers):
-        computer.inputs.append(input_sig)
-
-    while not all(comp.terminated for comp in computers):
+def build_amps(source_mem):
+    # All five amplifiers share one copy-on-write image of the program.
+    image = CowMemory(source_mem)
+    return [Computer(memory=image.fork(), inputs=[]) for x in range (5)]
+
+
+def wire_amps(computers):
+    # Each amplifier reads the channel the previous one writes to, and the
+    # last feeds back into the first, so signals move without any copying.
+    channels = [Channel() for comp in computers]
+    for number, comp in enumerate(computers):
+        comp.inputs = channels[number]
+        comp.outputs = channels[(number + 1) % len(channels)]
+
+
+def run_wired(combo, computers):
+    for comp, input_sig in zip(computers, combo):
+        comp.inputs.append(input_sig)
+    computers[0].inputs.append(0)
+
+    Scheduler(computers).run()
+    return computers[0].inputs[-1]
+
+
+def run_amps(combo, source_mem, computers=None):
+    if computers is None:
+        computers = build_amps(source_mem)
+    wire_amps(computers)
+    return run_wired(combo, computers)
+
+
+async def run_amps_async(combo, source_mem):
+    # Same ring as run_amps, but every amplifier is a task in one event loop
+    # awaiting its input queue.
+    queues = [asyncio.Queue() for input_sig in combo]
+    for queue, input_sig in zip(queues, combo):
+        queue.put_nowait(input_sig)
+    queues[0].put_nowait(0)
+
+    computers = build_amps(source_mem)
+    await asyncio.gather(*(
+        comp.run_async(queues[number], queues[(number + 1) % len(queues)])
+        for number, comp in enumerate(computers)
+    ))
+
+    result = None
+    while not queues[0].empty():
+        result = queues[0].get_nowait()
+    return result
+
+
+async def run_beside_ticker(program, queue):
+    # Runs `program` with its output going to `queue`, alongside a task that
+    # counts loop iterations and one that drains the queue. Returns the
+    # values drained and how often the ticker got to run meanwhile.
+    ticks = 0
+    received = []
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    async def drain():
+        while True:
+            received.append(await queue.get())
+
+    tasks = [asyncio.create_task(ticker()), asyncio.create_task(drain())]
+    computer = Computer(memory=program)
+    await computer.run_async(asyncio.Queue(), queue)
+    while not queue.empty():
+        await asyncio.sleep(0)
+    for task in tasks:
+        task.cancel()
+    return received, ticks
+
+
+def echo():
+    return Computer(memory=parse_opcodes('3,0,4,0,99'), inputs=[])
+
+
+def check_scheduler():
+    # Two machines each waiting on the other: deadlock, after one run each.
+    ring = connect(echo(), echo(), loop=True)
+    scheduler = Scheduler(ring)
+    assert scheduler.run() == DEADLOCKED
+    assert scheduler.resumes == 2
+
+    # A chain of five blocked echoes, plus a sixth blocked machine nobody
+    # feeds. One value goes down the chain with one resume per machine,
+    # and the sixth is never woken.
+    chain = [echo() for x in range(5)]
+    idle = echo()
+    for comp in chain + [idle]:
+        comp.run()
+    connect(*chain)
+    chain[0].inputs.append(7)
+    scheduler = Scheduler(chain + [idle])
+    assert scheduler.run() == DEADLOCKED
+    assert scheduler.resumes == 5
+    assert chain[-1].outputs == [7] and not idle.terminated
+
+    # Fan-out: one producer feeding two consumers through a Tee.
+    producer = Computer(memory=parse_opcodes('104,5,99'))
+    consumers = [echo(), echo()]
+    producer.outputs = Tee(*(comp.inputs for comp in consumers))
+    assert Scheduler([producer] + consumers).run() == HALTED
+    assert [comp.outputs for comp in consumers] == [[5], [5]]
+
+    # Fan-in: two producers writing to one consumer's input channel, which
+    # adds up what it reads.
+    adder = Computer(memory=parse_opcodes('3,11,3,12,1,11,12,11,4,11,99,0,0'))
+    producers = [Computer(memory=parse_opcodes('104,%d,99' % value)) for value in (1, 2)]
+    for comp in producers:
+        comp.outputs = adder.inputs
+    assert Scheduler([adder] + producers).run() == HALTED
+    assert adder.outputs == [3]
+
+
+def run_permutations(combos, source_mem):
+    # One bank of amplifiers for the whole sweep, reset from a snapshot of
+    # the fresh state before each permutation. The ring is wired once:
+    # restore() empties its channels in place and run_wired() refills them
+    # with the next phase settings.
+    computers = build_amps(source_mem)
+    wire_amps(computers)
+    fresh = computers[0].snapshot()
+
+    results = []
+    for combo in combos:
         for comp in computers:
-            comp.inputs.append(next_sig)
-            comp.run()
-            next_sig = comp.outputs.pop()
+            comp.restore(fresh)
+        results.append(run_wired(combo, computers))
+    return results
 
-    return next_sig
 
-def run_combos(source_mem):
-    combos = [x for x in itertools.permutations(range(5), 5)]
+def run_prefix_tree(phases, source_mem):
+    # Without feedback, the signal leaving amplifier k depends only on the
+    # first k phase settings, so walk the permutations as a prefix tree and
+    # run each amplifier once per distinct prefix (325 runs, not 600).
+    computer = Computer(memory=CowMemory(source_mem), inputs=[])
+    fresh = computer.snapshot()
 
-    results = [run_amps(combo, source_mem) for combo in combos]
-    return max(results)
+    def run_amp(phase, signal):
+        computer.restore(fresh)
+        computer.inputs.extend([phase, signal])
+        computer.run()
+        return computer.outputs[-1]
+
+    results = {}
+
+    def visit(prefix, signal):
+        remaining = [phase for phase in phases if phase not in prefix]
+        if not remaining:
+            results[prefix] = signal
+            return
+
+        for phase in remaining:
+            visit(prefix + (phase,), run_amp(phase, signal))
+
+    visit((), 0)
+    return results
+
+
+def run_combos(source_mem):
+    results = run_prefix_tree(range(5), source_mem)
+    return max(results.values())
 
 
 def run_feedback_combos(source_mem):
     combos = [x for x in itertools.permutations(range(5, 10), 5)]
-    results = [run_amps(combo, source_mem) for combo in combos]
+    results = run_permutations(combos, source_mem)
     return max(results)
 
 
 test_programs_1 = parse_opcodes('3,15,3,16,1002,16,10,16,1,16,15,15,4,15,99,0,0\n')
 test_programs_2 = parse_opcodes('3,23,3,24,1002,24,10,24,1002,23,-1,23,101,5,23,23,1,24,23,23,4,23,99,0,0\n')
 test_programs_3 = parse_opcodes('3,31,3,32,1002,32,10,32,1001,31,-2,31,1007,31,0,33,1002,33,7,33,1,33,31,31,1,32,31,31,4,31,99,0,0,0\n')
+test_programs_4 = parse_opcodes('3,26,1001,26,-4,26,3,27,1002,27,2,27,1,27,26,27,4,27,1001,28,-1,28,1005,28,6,99,0,0,5')
+test_programs_5 = parse_opcodes('3,52,1001,52,-5,52,3,53,1,52,56,54,1007,54,5,55,1005,55,26,1001,54,-5,54,1105,1,12,1,53,54,53,1008,54,0,55,1001,55,1,55,2,53,55,53,4,53,1001,56,-1,56,1005,56,6,99,0,0,0,0,10')
 
-assert run_amps([4,3,2,1,0], test_programs_1) == 43210
-assert run_amps([0,1,2,3,4], test_programs_2) == 54321
-assert run_amps([1,0,4,3,2], test_programs_3) == 65210
 
-assert run_combos(test_programs_1) == 43210
-assert run_combos(test_programs_2) == 54321
-assert run_combos(test_programs_3) == 65210
+def check():
+    assert run_amps([4,3,2,1,0], test_programs_1) == 43210
+    assert run_amps([0,1,2,3,4], test_programs_2) == 54321
+    assert run_amps([1,0,4,3,2], test_programs_3) == 65210
 
-with open('input.txt') as f:
-    input_mem = parse_opcodes(f.read())
-result = run_combos(input_mem)
-print('Result stage 1: %s' % result)
+    assert run_combos(test_programs_1) == 43210
+    assert run_combos(test_programs_2) == 54321
+    assert run_combos(test_programs_3) == 65210
 
-test_programs_4 = parse_opcodes('3,26,1001,26,-4,26,3,27,1002,27,2,27,1,27,26,27,4,27,1001,28,-1,28,1005,28,6,99,0,0,5')
-test_programs_5 = parse_opcodes('3,52,1001,52,-5,52,3,53,1,52,56,54,1007,54,5,55,1005,55,26,1001,54,-5,54,1105,1,12,1,53,54,53,1008,54,0,55,1001,55,1,55,2,53,55,53,4,53,1001,56,-1,56,1005,56,6,99,0,0,0,0,10')
+    assert run_amps([9,8,7,6,5], test_programs_4) == 139629729
+    assert run_amps([9,7,8,5,6], test_programs_5) == 18216
+    check_scheduler()
+
+    # Feedback rings on the translation tier, suspending and resuming blocks.
+    for combo, program, expected in [
+        ([9,8,7,6,5], test_programs_4, 139629729),
+        ([9,7,8,5,6], test_programs_5, 18216),
+    ]:
+        computers = [Computer(memory=program, inputs=[], translate=True) for x in range(5)]
+        assert run_amps(combo, program, computers) == expected
+
+    assert asyncio.run(run_amps_async([4,3,2,1,0], test_programs_1)) == 43210
+    assert asyncio.run(run_amps_async([9,8,7,6,5], test_programs_4)) == 139629729
+    assert asyncio.run(run_amps_async([9,7,8,5,6], test_programs_5)) == 18216
+
+    # A machine that only computes still lets other tasks run: this one
+    # counts mem[20] down from 100000 (200000 instructions).
+    countdown = [1001, 20, -1, 20, 1005, 20, 0, 99] + [0] * 12 + [100000]
+    received, ticks = asyncio.run(run_beside_ticker(countdown, asyncio.Queue()))
+    assert received == [] and ticks > 10
+
+    # And it waits for room on a bounded output queue. This one outputs
+    # mem[20] while counting it up from 0 to 1000.
+    counter = [1101, 0, 0, 20, 4, 20, 1001, 20, 1, 20, 1008, 20, 1000, 21, 1006, 21, 4, 99, 0, 0, 0, 0]
+    received, ticks = asyncio.run(run_beside_ticker(counter, asyncio.Queue(maxsize=1)))
+    assert received == list(range(1000))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Day 7: amplification circuit')
+    parser.add_argument('input', nargs='?', default=INPUT_PATH)
+    args = parser.parse_args(argv)
+
+    check()
+    input_mem = load_program(args.input)
+
+    result = run_combos(input_mem)
+    print('Result stage 1: %s' % result)
+
+    result = run_feedback_combos(input_mem)
+    print('Result stage 2: %s' % result)
 
-assert run_amps([9,8,7,6,5], test_programs_4) == 139629729
-assert run_amps([9,7,8,5,6], test_programs_5) == 18216
 
-result = run_feedback_combos(input_mem)
-print('Result stage 2: %s' % result)
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,11 @@
+import argparse
+from pathlib import Path
 from typing import List
 from pydantic import BaseModel
 
+HERE = Path(__file__).resolve().parent
+INPUT_PATH = HERE / 'input.txt'
+
 
 class Layer(BaseModel):
     image: List[List[int]]
@@ -50,12 +55,6 @@ def parse_image(str_input, height, width):
 # Layer 2: 789
 #          012
 test_image_data = '123456789012\n'
-test_image = parse_image(test_image_data, 2, 3)
-assert len(test_image.layers) == 2
-assert test_image.layers[0].image[0] == [1, 2, 3]
-assert test_image.layers[0].image[1] == [4, 5, 6]
-assert test_image.layers[1].image[0] == [7, 8, 9]
-assert test_image.layers[1].image[1] == [0, 1, 2]
 
 def find_layer_fewest_zeros(image):
     zero_counts = {
@@ -75,12 +74,6 @@ def find_layer_fewest_zeros(image):
     # import pdb; pdb.set_trace()
     return layer.find_digit_count(1) * layer.find_digit_count(2)
 
-with open('input.txt') as f:
-    image = parse_image(f.read(), 6, 25)
-
-assert len(image.layers) == 100
-result = find_layer_fewest_zeros(image)
-print('Found layer value: %s' % result)
 
 
 def generate_image(image):
@@ -123,21 +116,42 @@ class FinalImage(BaseModel):
 
 
 test_image_2_data = '0222112222120000\n'
-test_image_2 = parse_image(test_image_2_data, 2, 2)
-test_final_image = generate_image(test_image_2)
 
-assert test_final_image.image[0] == [0, 1]
-assert test_final_image.image[1] == [1, 0]
 
-test_final_image.create_ppm('test_final_image.pbm')
-final_image = generate_image(image)
-final_image.create_ppm('output.pbm')
+def check(output_dir=HERE):
+    test_image = parse_image(test_image_data, 2, 3)
+    assert len(test_image.layers) == 2
+    assert test_image.layers[0].image[0] == [1, 2, 3]
+    assert test_image.layers[0].image[1] == [4, 5, 6]
+    assert test_image.layers[1].image[0] == [7, 8, 9]
+    assert test_image.layers[1].image[1] == [0, 1, 2]
+
+    test_image_2 = parse_image(test_image_2_data, 2, 2)
+    test_final_image = generate_image(test_image_2)
 
+    assert test_final_image.image[0] == [0, 1]
+    assert test_final_image.image[1] == [1, 0]
 
+    test_final_image.create_ppm(Path(output_dir) / 'test_final_image.pbm')
 
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Day 8: space image format')
+    parser.add_argument('input', nargs='?', default=INPUT_PATH)
+    parser.add_argument('--output', default=HERE / 'output.pbm')
+    args = parser.parse_args(argv)
 
+    check(Path(args.output).parent)
+    with open(args.input) as f:
+        image = parse_image(f.read(), 6, 25)
 
+    assert len(image.layers) == 100
+    result = find_layer_fewest_zeros(image)
+    print('Found layer value: %s' % result)
 
+    final_image = generate_image(image)
+    final_image.create_ppm(args.output)
 
 
+if __name__ == '__main__':
+    main()
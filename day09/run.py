@@ -1,323 +1,178 @@
-from typing import List
-from pydantic import BaseModel
-import itertools
-from enum import IntEnum
-from defaultlist import defaultlist
-
-
-class Instruction(BaseModel):
-    opcode: int
-    address: int
-
-    def assign_operate(self):
-        return RanInstruction(
-            instruction=self,
-            result=0,
-        )
-
-    def get_next_index(self, old_index):
-        return old_index + self.next_step
-
-
-class TerminateInstruction(Instruction):
-    next_step = 1
-
-
-class IOInstruction(Instruction):
-    next_step = 2
-
-
-class InputInstruction(IOInstruction):
-    save_address: int
-    input_val: int
-
-
-class OutputInstruction(IOInstruction):
-    output_value: int
-
-
-class ArithInstruction(Instruction):
-    noun: int
-    verb: int
-    output_address: int
-    next_step = 4
-
-    def assign_operate(self):
-        return RanInstruction(
-            instruction=self,
-            result=self.operate(),
-        )
-
-
-class AddInstruction(ArithInstruction):
-    def operate(self):
-        return self.noun + self.verb
-
-
-class MulInstruction(ArithInstruction):
-    def operate(self):
-        return self.noun * self.verb
-
-
-class LessThanInstruction(ArithInstruction):
-    def operate(self):
-        return int(self.noun < self.verb)
-
-
-class EqualsInstruction(ArithInstruction):
-    def operate(self):
-        return int(self.noun == self.verb)
-
-
-class JumpInstruction(Instruction):
-    condition: int
-    jump_address: int
-    next_step = 3
-
-    def get_next_index(self, old_index):
-        if self.condition_passes():
-            return self.jump_address
-        else:
-            return super().get_next_index(old_index)
-
-
-class JumpIfTrueInstruction(JumpInstruction):
-    def condition_passes(self):
-        return bool(self.condition)
-
-
-class JumpIfFalseInstruction(JumpInstruction):
-    def condition_passes(self):
-        return not bool(self.condition)
-
-
-class AdjustRelativeInstruction(Instruction):
-    next_step = 2
-    relative_add: int
-
-
-class RanInstruction(BaseModel):
-    instruction: Instruction
-    result: int
-
-
-class ModeEnum(IntEnum):
-    POSITION_MODE = 0
-    IMMEDIATE_MODE = 1
-    RELATIVE_MODE = 2
-
-
-def get_digit(number, digit):
-    return number // 10**digit % 10
-
-
-def get_codes(instruction_code):
-    opcode = instruction_code % 100
-    param_mode_1 = ModeEnum(get_digit(instruction_code, 2))
-    param_mode_2 = ModeEnum(get_digit(instruction_code, 3))
-    param_mode_3 = ModeEnum(get_digit(instruction_code, 4))
-
-    return opcode, param_mode_1, param_mode_2, param_mode_3
-
-
-class Computer(BaseModel):
-    memory: List[int]
-    history: List[RanInstruction]=[]
-    inputs: List=[]
-    outputs: List=[]
-    index: int=0
-    relative_base: int=0
-    terminated: bool=False
-
-    def get_var(self, var, param_mode: ModeEnum):
-        if param_mode == ModeEnum.POSITION_MODE:
-            self.pad_mem(var)
-            return self.memory[var]
-        elif param_mode == ModeEnum.IMMEDIATE_MODE:
-            return var
-        elif param_mode == ModeEnum.RELATIVE_MODE:
-            self.pad_mem(self.relative_base + var)
-            return self.memory[self.relative_base + var]
-
-    def pad_mem(self, new_length):
-        self.memory += [0] * ((new_length + 1) - len(self.memory))
-
-    def get_address(self, var, param_mode: ModeEnum):
-        if param_mode == ModeEnum.POSITION_MODE:
-            return var
-        elif param_mode == ModeEnum.RELATIVE_MODE:
-            return self.relative_base + var
-
-    def set_address(self, address, value, param_mode: ModeEnum):
-        act_address = self.get_address(address, param_mode)
-        self.pad_mem(act_address)
-        self.memory[act_address] = value
-
-
-    def run(self):
-        # index = 0
-        # keep_running = True
-
-        instructionMap = {
-            1: AddInstruction,
-            2: MulInstruction,
-            3: InputInstruction,
-            4: OutputInstruction,
-            5: JumpIfTrueInstruction,
-            6: JumpIfFalseInstruction,
-            7: LessThanInstruction,
-            8: EqualsInstruction,
-            9: AdjustRelativeInstruction,
-            99: TerminateInstruction,
-        }
-
-        arith_instructions = [
-            AddInstruction,
-            MulInstruction,
-            LessThanInstruction,
-            EqualsInstruction
-        ]
-
-        io_instructions = [
-            InputInstruction,
-            OutputInstruction,
-        ]
-
-        jmp_instructions = [
-            JumpIfTrueInstruction,
-            JumpIfFalseInstruction,
-        ]
-
-        while not self.terminated:
-            self.pad_mem(self.index)
-            opcode, pm_1, pm_2, pm_3 = get_codes(self.memory[self.index])
-            instructionType = instructionMap[opcode]
-
-            if instructionType in arith_instructions:
-                self.pad_mem(self.index + 3)
-                loc_1, loc_2, loc_3 = self.memory[self.index+1:self.index+4]
-
-                var_1 = self.get_var(loc_1, pm_1)
-                var_2 = self.get_var(loc_2, pm_2)
-
-                instruct = instructionType(
-                    opcode=opcode,
-                    address=self.index,
-                    noun=var_1,
-                    verb=var_2,
-                    output_address=loc_3,
-                )
-
-                instructed = instruct.assign_operate()
-                # self.pad_mem(instructed.instruction.output_address)
-                # self.memory[instructed.instruction.output_address] = instructed.result
-                self.set_address(instructed.instruction.output_address, instructed.result, pm_3)
-
-            elif instructionType in io_instructions:
-                self.pad_mem(self.index + 1)
-                loc_1 = self.memory[self.index+1]
-                var_1 = self.get_var(loc_1, pm_1)
-
-                if instructionType == InputInstruction:
-                    if not self.inputs:
-                        return
-
-                    value = self.inputs.pop(0)
-                    instruct = InputInstruction(
-                        opcode=opcode,
-                        address=self.index,
-                        save_address=loc_1,
-                        input_val=value
-                    )
-
-                    # if pm_1 == ModeEnum.POSITION_MODE:
-                    #     address = instruct.save_address
-                    # else:
-                    #   address = self.relative_base + instruct.save_address
-                    # address = get_address
-                    # self.pad_mem(address)
-                    # self.memory[address] = value
-                    self.set_address(instruct.save_address, value, pm_1)
-                else:
-                    instruct = OutputInstruction(
-                        opcode=opcode,
-                        address=self.index,
-                        output_value=var_1,
-                    )
-                    self.outputs.append(instruct.output_value)
-
-                instructed = instruct.assign_operate()
-
-            elif instructionType in jmp_instructions:
-                self.pad_mem(self.index + 2)
-                loc_1, loc_2 = self.memory[self.index+1:self.index+3]
-
-                var_1 = self.get_var(loc_1, pm_1)
-                var_2 = self.get_var(loc_2, pm_2)
-
-                instruct = instructionType(
-                    opcode=opcode,
-                    address=self.index,
-                    condition=var_1,
-                    jump_address=var_2,
-                )
-
-                instructed = instruct.assign_operate()
-
-            elif instructionType == AdjustRelativeInstruction:
-                self.pad_mem(self.index + 1)
-                loc_1 = self.memory[self.index+1]
-                var_1 = self.get_var(loc_1, pm_1)
-
-                instruct = instructionType(
-                    opcode=opcode,
-                    address=self.index,
-                    relative_add=var_1
-                )
-                self.relative_base += instruct.relative_add
-                instructed = instruct.assign_operate()
-
-            elif opcode == 99:
-                instruct = TerminateInstruction(
-                    opcode=opcode, address=self.index
-                )
-                self.terminated = True
-                instructed = instruct.assign_operate()
-
-            self.index = instruct.get_next_index(self.index)
-            self.history.append(instructed)
-
-        # return computer
-
-
-def parse_opcodes(input_str):
-    return [int(x) for x in input_str.strip().split(',')]
-
-
-def create_and_run(codes, inputs=None):
-    inputs = inputs or []
-    computer = Computer(memory=codes.copy(), inputs=inputs)
-    computer.run()
-    return computer
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from intcode import (
+    HALTED,
+    OUT_OF_BUDGET,
+    TIMED_OUT,
+    ArrayMemory,
+    Computer,
+    CowMemory,
+    PagedMemory,
+    Profiler,
+    create_and_run,
+    dump_checkpoint,
+    dump_program,
+    load_program,
+    parse_checkpoint,
+    parse_opcodes,
+    parse_program,
+    run_batch,
+)
+
+INPUT_PATH = Path(__file__).resolve().parent / 'input.txt'
 
 
 test_programs_1 = parse_opcodes('109,1,204,-1,1001,100,1,100,1008,100,16,101,1006,101,0,99\n')
 test_programs_2 = parse_opcodes('1102,34915192,34915192,7,4,7,99,0\n')
 test_programs_3 = parse_opcodes('104,1125899906842624,99\n')
 
-test_comp_1 = create_and_run(test_programs_1)
-test_comp_2 = create_and_run(test_programs_2)
-test_comp_3 = create_and_run(test_programs_3)
-
-assert test_comp_1.outputs == [109,1,204,-1,1001,100,1,100,1008,100,16,101,1006,101,0,99]
-assert len(str(test_comp_2.outputs[0])) == 16
-assert test_comp_3.outputs == [1125899906842624]
-
-with open('input.txt') as f:
-    input_mem = parse_opcodes(f.read())
-computer = create_and_run(input_mem, [1])
-print('Result stage 1: %s' % computer.outputs)
-
-computer = create_and_run(input_mem, [2])
-print('Result stage 2: %s' % computer.outputs)
 
+def check():
+    test_comp_1 = create_and_run(test_programs_1)
+    test_comp_2 = create_and_run(test_programs_2)
+    test_comp_3 = create_and_run(test_programs_3)
+
+    assert test_comp_1.outputs == [109,1,204,-1,1001,100,1,100,1008,100,16,101,1006,101,0,99]
+    assert len(str(test_comp_2.outputs[0])) == 16
+    assert test_comp_3.outputs == [1125899906842624]
+
+    # Same programs on int64 storage, which has to promote to bigints.
+    for program, expected in [
+        (test_programs_1, test_programs_1),
+        (test_programs_2, [1219070632396864]),
+        (test_programs_3, [1125899906842624]),
+    ]:
+        computer = Computer(memory=ArrayMemory(program))
+        computer.run()
+        assert computer.outputs == expected
+
+    # And on the translation tier, plus a loop that rewrites the immediate
+    # operand of its own first instruction on every pass.
+    self_modifying = [1101, 0, 50, 100, 1001, 2, -1, 2, 1005, 2, 0, 99]
+    for program in [test_programs_1, test_programs_2, test_programs_3, self_modifying]:
+        interpreted = create_and_run(program)
+        translated = Computer(memory=program, translate=True)
+        translated.run()
+        assert translated.outputs == interpreted.outputs
+        assert translated.memory == interpreted.memory
+        assert translated.relative_base == interpreted.relative_base
+    assert translated.memory.read(2) == 0 and translated.memory.read(100) == 1
+
+    # Profile of a countdown that outputs 3, 2, 1, read from an input that
+    # first suspends the run: the input is only counted once.
+    profiler = Profiler()
+    countdown = Computer(memory=[3, 20, 4, 20, 1001, 20, -1, 20, 1005, 20, 2, 99], profiler=profiler)
+    countdown.run()
+    countdown.inputs.append(3)
+    countdown.run()
+    assert countdown.outputs == [3, 2, 1]
+    assert profiler.addresses == {0: 1, 2: 3, 4: 3, 8: 3, 11: 1}
+    assert profiler.opcodes == {3: 1, 4: 3, 1: 3, 5: 3, 99: 1}
+    assert profiler.loops() == [(2, 8, 2)]
+    assert [interval[:3] for interval in profiler.intervals] == [
+        ('in', 0, 1), ('out', 2, 1), ('out', 2, 3), ('out', 2, 3),
+    ]
+    assert 'intcode;loop@2;8 3' in profiler.folded().splitlines()
+
+    # A far write allocates one page; len(), == and repr() don't fill in
+    # the ten billion cells below it.
+    far = create_and_run([1101, 1, 1, 10 ** 10, 99])
+    assert len(far.memory) == (10 ** 10 & ~1023) + 1024
+    assert far.memory == far.memory.fork()
+    assert 'pages={9765625: [2, 0' in repr(far.memory)
+
+    # A negative address is an error on every backend and tier, not a read
+    # from the end of the dense list.
+    for backend in [PagedMemory, ArrayMemory, CowMemory]:
+        for translate in [False, True]:
+            for program in [[4, -1, 99], [109, -5, 204, 3, 99], [1101, 1, 1, -1, 99]]:
+                computer = Computer(memory=backend(program), translate=translate)
+                try:
+                    computer.run()
+                except IndexError:
+                    pass
+                else:
+                    assert False, (backend, translate, program, computer.outputs)
+
+    # A checkpoint taken while waiting, with a bigint on a sparse page and
+    # input queued but not read yet, resumes as if never interrupted.
+    big = 1125899906842624
+    waiting = Computer(memory=[1102, big, big, 100000, 3, 11, 4, 11, 4, 100000, 99, 0])
+    waiting.run()
+    waiting.inputs.append(42)
+    assert waiting.memory.sparse_pages()
+    restored = parse_checkpoint(dump_checkpoint(waiting))
+    assert restored.snapshot() == waiting.snapshot()
+    restored.run()
+    assert restored.outputs == [42, big * big]
+
+    # The binary program format keeps every cell, including ones too big
+    # for int64 and the escape marker's own value.
+    for program in [
+        load_program(INPUT_PATH),
+        test_programs_3,
+        [big * big, -1 << 63, (1 << 63) - 1, -big * big],
+    ]:
+        assert parse_program(dump_program(program)) == program
+
+    # Running in budget-sized slices ends where one unlimited run does.
+    unlimited = create_and_run(test_programs_1)
+    sliced = Computer(memory=test_programs_1, budget=7)
+    sliced.run()
+    assert sliced.stop_reason == OUT_OF_BUDGET
+    while sliced.stop_reason == OUT_OF_BUDGET:
+        sliced.run()
+    assert sliced.stop_reason == HALTED
+    assert sliced.snapshot() == unlimited.snapshot()
+
+    # A timeout stops a long loop part way; it finishes once lifted.
+    countdown = [1001, 100, -1, 100, 1005, 100, 0, 99] + [0] * 92 + [100000]
+    timed = Computer(memory=countdown, timeout=0)
+    timed.run()
+    assert timed.stop_reason == TIMED_OUT and timed.memory.read(100) > 0
+    timed.timeout = None
+    timed.run()
+    assert timed.stop_reason == HALTED and timed.memory.read(100) == 0
+
+    # Jobs in a batch don't share memory, even when handed a backend.
+    echo = PagedMemory(parse_opcodes('3,0,4,0,99\n'))
+    results = sorted(run_batch(echo, [[1], [2]], processes=0))
+    assert [result.outputs for result in results] == [[1], [2]]
+    assert echo == [3, 0, 4, 0, 99]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Day 9: sensor boost')
+    parser.add_argument('input', nargs='?', default=INPUT_PATH)
+    parser.add_argument(
+        '--profile', metavar='FOLDED',
+        help='profile stage 2 and write flamegraph folded stacks here',
+    )
+    args = parser.parse_args(argv)
+
+    check()
+    input_mem = load_program(args.input)
+
+    # Both BOOST modes are well under a second each; a process pool would
+    # cost more to start than it saves.
+    results = {
+        result.job_id: result
+        for result in run_batch(input_mem, [[1], [2]], processes=0)
+    }
+    print('Result stage 1: %s' % results[0].outputs)
+    print('Result stage 2: %s' % results[1].outputs)
+
+    if args.profile:
+        profiler = Profiler()
+        computer = Computer(memory=input_mem, inputs=[2], profiler=profiler)
+        computer.run()
+        print(profiler.report(input_mem))
+        profiler.write_folded(args.profile, input_mem)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+from .batch import JobResult, run_batch
+from .channels import Channel, Sink, connect
+from .checkpoint import dump_checkpoint, load_checkpoint, parse_checkpoint, save_checkpoint
+from .computer import (
+    HALTED,
+    OUT_OF_BUDGET,
+    TIMED_OUT,
+    WAITING,
+    Computer,
+    Snapshot,
+    create_and_run,
+)
+from .history import FileHistory, History, RingHistory
+from .instructions import (
+    DECODE_TABLE,
+    ModeEnum,
+    RanInstruction,
+    decode,
+    get_codes,
+    instructionMap,
+)
+from .memory import ArrayMemory, CowMemory, Memory, PagedMemory
+from .profiler import Profiler
+from .program import convert_program, dump_program, load_program, parse_opcodes, parse_program
+from .scheduler import DEADLOCKED, Scheduler, Tee
+from .search import MemoryEquals, search
+from .symbolic import Polynomial, run_symbolic, solve
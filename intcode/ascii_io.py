@@ -0,0 +1,155 @@
+"""Line-oriented ASCII I/O for Intcode programs that talk in text.
+
+    python -m intcode.ascii_io program.txt < commands.txt
+
+Output is decoded as it is produced, one line at a time, and input is
+encoded from the source a line at a time when the program asks for it, so
+neither side is held in memory in full.
+"""
+import argparse
+import io
+import sys
+
+from .channels import Channel, Sink
+from .computer import WAITING, Computer
+from .program import load_program
+
+NEWLINE = ord('\n')
+
+
+def encode(text):
+    return [ord(char) for char in text]
+
+
+def decode(values):
+    return ''.join(chr(value) for value in values)
+
+
+class LineWriter(Sink):
+    """Output channel that decodes ASCII and hands over complete lines.
+
+    `on_line` gets each line without its newline as soon as the newline is
+    output. A value outside ASCII (typically a puzzle answer) goes to
+    `on_value`, or by default ends the current line and is passed to
+    `on_line` as its decimal string.
+    """
+
+    def __init__(self, on_line, on_value=None):
+        super().__init__(self.put)
+        self.on_line = on_line
+        self.on_value = on_value
+        self.line = []
+
+    @classmethod
+    def to_file(cls, file):
+        def write(line):
+            file.write(line + '\n')
+            file.flush()
+        return cls(write)
+
+    def put(self, value):
+        if value == NEWLINE:
+            self.on_line(''.join(self.line))
+            self.line.clear()
+        elif 0 <= value < 128:
+            self.line.append(chr(value))
+        elif self.on_value is not None:
+            self.on_value(value)
+        else:
+            self.flush()
+            self.on_line(str(value))
+
+    def flush(self):
+        """Hand over a partial line, e.g. a prompt, once the program waits."""
+        if self.line:
+            self.on_line(''.join(self.line))
+            self.line.clear()
+
+    def __reduce__(self):
+        return type(self), (self.on_line, self.on_value)
+
+
+class LineReader(Channel):
+    """Input channel that encodes the next line of `source` (a file or any
+    iterable of strings) only when a reader finds the channel empty.
+
+    Lines get a trailing newline if they lack one. Values appended directly
+    are read before any further line is pulled. `before_read` is called
+    before each pull, e.g. to flush a prompt the program printed. Only
+    refill() and popleft() pull; len(), iteration and copies (snapshot,
+    fork, checkpoint) see what is buffered and never touch `source`.
+    """
+
+    def __init__(self, source, before_read=None):
+        super().__init__()
+        self.lines = iter(source)
+        self.before_read = before_read
+
+    def refill(self):
+        if self.before_read is not None:
+            self.before_read()
+        line = next(self.lines, None)
+        if line is None:
+            return False
+        if not line.endswith('\n'):
+            line += '\n'
+        self.extend(encode(line))
+        return True
+
+    def popleft(self):
+        if not self:
+            self.refill()
+        return super().popleft()
+
+    def __reduce__(self):
+        raise TypeError('LineReader reads from a live source and cannot be pickled')
+
+
+def run_ascii(computer, source, output):
+    """Run `computer` reading lines from `source` and writing lines to the
+    file-like `output`, until it halts or `source` runs dry while it waits
+    for input. Returns the computer."""
+    writer = LineWriter.to_file(output)
+    computer.inputs = LineReader(source, before_read=writer.flush)
+    computer.outputs = writer
+    computer.run()
+    writer.flush()
+    return computer
+
+
+# Prints a "> " prompt, echoes one line of input, then outputs 1000 (as a
+# puzzle answer would be), and starts over.
+ECHO_PROGRAM = [104, 62, 104, 32, 3, 100, 4, 100, 1008, 100, 10, 101, 1006, 101, 4, 104, 1000, 1105, 1, 0]
+
+
+def check():
+    output = io.StringIO()
+    computer = run_ascii(Computer(memory=ECHO_PROGRAM), io.StringIO('hi\nyo'), output)
+    assert output.getvalue() == '> \nhi\n1000\n> \nyo\n1000\n> \n'
+    assert computer.stop_reason == WAITING
+
+    # Lines are only pulled when the program reads: inspecting or copying
+    # the channel leaves the source alone.
+    lines = []
+    values = []
+    reader = LineReader(['abc'])
+    computer = Computer(memory=ECHO_PROGRAM, inputs=reader, outputs=LineWriter(lines.append, values.append))
+    assert len(reader) == 0 and not reader
+    computer.snapshot()
+    computer.fork()
+    computer.run()
+    assert lines == ['> abc'] and values == [1000]
+    assert computer.stop_reason == WAITING and not reader
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run an ASCII Intcode program')
+    parser.add_argument('program')
+    args = parser.parse_args(argv)
+
+    check()
+    run_ascii(Computer(memory=load_program(args.program)), sys.stdin, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import functools
+import os
+from typing import List, NamedTuple, Optional
+
+from .computer import Computer
+from .memory import CowMemory
+from .pool import batched, map_with_state
+
+
+class JobResult(NamedTuple):
+    job_id: int
+    outputs: List[int]
+    terminated: bool
+    error: Optional[str]
+    stop_reason: Optional[str] = None
+
+
+def run_chunk(program, chunk, budget=None, timeout=None):
+    # Every job gets its own copy-on-write fork of one image, so jobs never
+    # see each other's writes, nor write to `program` itself. run_batch
+    # passes a CowMemory, so this is a fork too, not a copy of the image.
+    image = CowMemory.from_memory(program)
+
+    results = []
+    for job_id, inputs in chunk:
+        computer = Computer(
+            memory=image.fork(), inputs=list(inputs), budget=budget, timeout=timeout,
+        )
+        try:
+            computer.run()
+        except (IndexError, ValueError) as error:
+            results.append(JobResult(job_id, list(computer.outputs), False, str(error)))
+        else:
+            results.append(JobResult(
+                job_id, list(computer.outputs), computer.terminated, None,
+                computer.stop_reason,
+            ))
+    return results
+
+
+def run_batch(program, jobs, processes=None, chunk_size=1, budget=None, timeout=None):
+    """Run `program` once per input list in `jobs` across a process pool.
+
+    Yields a JobResult per job as it completes, in completion order; the
+    job_id is the job's position in `jobs`. A job the VM rejects (unknown
+    opcode, negative address) is reported through `error` rather than
+    stopping the batch. Small jobs can be grouped with `chunk_size` to cut
+    per-task overhead. With processes=0 everything runs in this process.
+
+    `budget` (instructions) and `timeout` (seconds) bound every job, so a
+    program that never halts can't pin a worker; such a job comes back
+    with terminated=False and the limit it hit as its stop_reason.
+    """
+    chunks = batched(enumerate(jobs), chunk_size)
+    image = CowMemory.from_memory(program)
+
+    if processes == 0:
+        for chunk in chunks:
+            yield from run_chunk(image, chunk, budget, timeout)
+        return
+
+    processes = processes or os.cpu_count()
+    run = functools.partial(run_chunk, image, budget=budget, timeout=timeout)
+    outcomes = map_with_state(processes, run, chunks)
+    try:
+        for _, results in outcomes:
+            yield from results
+    finally:
+        outcomes.close()
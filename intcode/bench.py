@@ -0,0 +1,251 @@
+"""Benchmarks for the Intcode VM.
+
+Runs the day02, day05, day07 and day09 programs plus a few synthetic
+long-running loops on every VM configuration, and reports instructions per
+second, wall time, peak memory and memory blocks still held once the
+workload returns. Results can be saved as JSON and compared against an
+earlier run:
+
+    python -m intcode.bench --output before.json
+    ... change things ...
+    python -m intcode.bench --compare before.json
+"""
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from pathlib import Path
+
+from .computer import Computer
+from .memory import ArrayMemory, CowMemory
+from .profiler import Profiler
+from .program import load_program
+from .scheduler import Scheduler
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def countdown(count):
+    # mem[100] -= 1 until it reaches zero.
+    program = [1001, 100, -1, 100, 1005, 100, 0, 99]
+    return program + [0] * (100 - len(program)) + [count]
+
+
+def self_modifying(count):
+    # Counts down the immediate operand of its own first instruction, so
+    # every iteration rewrites code.
+    return [1101, 0, count, 100, 1001, 2, -1, 2, 1005, 2, 0, 99]
+
+
+def sweep(count):
+    # Moves the relative base forward one cell per iteration and writes
+    # under it, growing memory as it goes.
+    return [109, 1, 21101, 1, 1, 16, 1001, 15, -1, 15, 1005, 15, 0, 99, 0, count]
+
+
+def run_program(make, program, inputs):
+    computer = make(program, inputs)
+    computer.run()
+    return list(computer.outputs)
+
+
+def run_feedback_loops(make, program):
+    # Every day07 part 2 phase permutation, each on its own ring of five
+    # machines driven by the Scheduler.
+    results = []
+    for phases in itertools.permutations(range(5, 10)):
+        computers = [make(program, [phase]) for phase in phases]
+        for computer, downstream in zip(computers, computers[1:] + computers[:1]):
+            computer.outputs = downstream.inputs
+        computers[0].inputs.append(0)
+        Scheduler(computers).run()
+        results.append(computers[0].inputs[-1])
+    return [max(results)]
+
+
+def day_program(day):
+    return load_program(ROOT / day / 'input.txt')
+
+
+def day02(make):
+    program = day_program('day02')
+    program[1:3] = [12, 2]
+    outputs = []
+    # A single day02 run is tiny; repeat it to get a measurable time.
+    for _ in range(200):
+        computer = make(program, [])
+        computer.run()
+        outputs.append(computer.memory.read(0))
+    return outputs[:1]
+
+
+WORKLOADS = {
+    'day02': day02,
+    'day05-part1': lambda make: run_program(make, day_program('day05'), [1]),
+    'day05-part2': lambda make: run_program(make, day_program('day05'), [5]),
+    'day07-feedback': lambda make: run_feedback_loops(make, day_program('day07')),
+    'day09-part1': lambda make: run_program(make, day_program('day09'), [1]),
+    'day09-part2': lambda make: run_program(make, day_program('day09'), [2]),
+    'countdown': lambda make: run_program(make, countdown(200000), []),
+    'self-modifying': lambda make: run_program(make, self_modifying(50000), []),
+    'sweep': lambda make: run_program(make, sweep(50000), []),
+}
+
+
+def interpreter(program, inputs):
+    return Computer(memory=program, inputs=inputs)
+
+
+def translated(program, inputs):
+    return Computer(memory=program, inputs=inputs, translate=True)
+
+
+def compact(program, inputs):
+    return Computer(memory=ArrayMemory(program), inputs=inputs)
+
+
+def copy_on_write(program, inputs):
+    return Computer(memory=CowMemory(program), inputs=inputs)
+
+
+VMS = {
+    'interpreter': interpreter,
+    'translate': translated,
+    'array-memory': compact,
+    'cow-memory': copy_on_write,
+}
+
+
+def count_instructions(workload):
+    profilers = []
+
+    def make(program, inputs):
+        computer = interpreter(program, inputs)
+        computer.profiler = Profiler()
+        profilers.append(computer.profiler)
+        return computer
+
+    workload(make)
+    return sum(sum(profiler.opcodes.values()) for profiler in profilers)
+
+
+def measure(workload, make, repeat):
+    """Best wall time over `repeat` runs, then one traced run for memory."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        outputs = workload(make)
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best:
+            best = elapsed
+
+    # tracemalloc slows everything down, so it gets a run of its own. It
+    # reports the peak and the blocks still held when the workload
+    # returns (caches and the like), not a count of allocations made.
+    tracemalloc.start()
+    try:
+        workload(make)
+        _, peak = tracemalloc.get_traced_memory()
+        blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+    finally:
+        tracemalloc.stop()
+
+    return outputs, best, peak, blocks
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(workloads=None, vms=None, repeat=3):
+    """Benchmark each workload on each VM; returns a JSON-ready dict.
+
+    Raises AssertionError if two VMs disagree on a workload's outputs.
+    """
+    workloads = workloads or list(WORKLOADS)
+    vms = vms or list(VMS)
+    results = []
+    for name in workloads:
+        workload = WORKLOADS[name]
+        instructions = count_instructions(workload)
+        expected = None
+        for vm in vms:
+            outputs, seconds, peak, blocks = measure(workload, VMS[vm], repeat)
+            if expected is None:
+                expected = outputs
+            assert outputs == expected, '%s gave %s on %s, expected %s' % (
+                vm, outputs, name, expected,
+            )
+            results.append({
+                'workload': name,
+                'vm': vm,
+                'instructions': instructions,
+                'seconds': seconds,
+                'instructions_per_second': instructions / seconds,
+                'peak_bytes': peak,
+                'retained_blocks': blocks,
+            })
+
+    return {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+
+def format_results(report, baseline=None):
+    previous = {}
+    if baseline is not None:
+        previous = {(row['workload'], row['vm']): row for row in baseline['results']}
+
+    lines = ['%-16s %-12s %12s %10s %14s %12s %10s' % (
+        'workload', 'vm', 'instructions', 'seconds', 'instr/s', 'peak KiB', 'retained',
+    )]
+    for row in report['results']:
+        line = '%-16s %-12s %12d %10.4f %14.0f %12.1f %10d' % (
+            row['workload'], row['vm'], row['instructions'], row['seconds'],
+            row['instructions_per_second'], row['peak_bytes'] / 1024,
+            row['retained_blocks'],
+        )
+        old = previous.get((row['workload'], row['vm']))
+        if old is not None:
+            line += '  %+6.1f%%' % (100.0 * (row['seconds'] / old['seconds'] - 1))
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Intcode VM')
+    parser.add_argument('--workload', action='append', choices=list(WORKLOADS))
+    parser.add_argument('--vm', action='append', choices=list(VMS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write the results here as JSON')
+    parser.add_argument('--compare', help='JSON results to show time changes against')
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    report = run_benchmarks(args.workload, args.vm, args.repeat)
+    print(format_results(report, baseline))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+
+
+if __name__ == '__main__':
+    main()
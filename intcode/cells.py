@@ -0,0 +1,72 @@
+import struct
+import sys
+from array import array
+
+# Cells are stored as little-endian int64. A value that doesn't fit is
+# replaced by ESCAPE and stored separately as a variable-length integer;
+# ESCAPE itself is escaped too, so any cell holding it is an escaped one.
+ESCAPE = -1 << 63
+INT64_MAX = (1 << 63) - 1
+
+SECTION_HEADER = struct.Struct('<QQ')
+OVERFLOW_HEADER = struct.Struct('<QI')
+
+
+def to_int64_array(values):
+    """Pack `values` into array('q'), escaping cells that don't fit.
+
+    Returns the array and a {position: value} dict of escaped cells.
+    """
+    try:
+        cells = array('q', values)
+    except OverflowError:
+        cells = None
+    if cells is not None and ESCAPE not in cells:
+        return cells, {}
+
+    cells = array('q')
+    overflow = {}
+    for position, value in enumerate(values):
+        if ESCAPE < value <= INT64_MAX:
+            cells.append(value)
+        else:
+            cells.append(ESCAPE)
+            overflow[position] = value
+    return cells, overflow
+
+
+def pack_cells(values):
+    """Encode a sequence of Intcode values as a self-delimiting section."""
+    cells, overflow = to_int64_array(values)
+    if sys.byteorder != 'little':
+        cells.byteswap()
+
+    parts = [SECTION_HEADER.pack(len(cells), len(overflow)), cells.tobytes()]
+    for position, value in overflow.items():
+        raw = value.to_bytes((value.bit_length() + 8) // 8, 'little', signed=True)
+        parts.append(OVERFLOW_HEADER.pack(position, len(raw)))
+        parts.append(raw)
+    return b''.join(parts)
+
+
+def unpack_cells(buffer, offset=0):
+    """Decode a pack_cells section from `buffer` at `offset`.
+
+    Returns the values as a list and the offset just past the section.
+    """
+    count, escaped = SECTION_HEADER.unpack_from(buffer, offset)
+    offset += SECTION_HEADER.size
+
+    cells = array('q')
+    cells.frombytes(buffer[offset:offset + 8 * count])
+    if sys.byteorder != 'little':
+        cells.byteswap()
+    offset += 8 * count
+
+    values = cells.tolist()
+    for _ in range(escaped):
+        position, size = OVERFLOW_HEADER.unpack_from(buffer, offset)
+        offset += OVERFLOW_HEADER.size
+        values[position] = int.from_bytes(buffer[offset:offset + size], 'little', signed=True)
+        offset += size
+    return values, offset
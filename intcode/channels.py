@@ -0,0 +1,57 @@
+from collections import deque
+
+
+class Channel(deque):
+    """FIFO of Intcode values: O(1) append at the back, popleft at the front.
+
+    The same Channel can be one Computer's `outputs` and another's `inputs`,
+    which wires the two machines together with no copying in between.
+    """
+
+    def refill(self):
+        """Called when a reader finds the channel empty; a channel fed from
+        an outside source adds to itself here and returns True if it did."""
+        return False
+
+    def __eq__(self, other):
+        if isinstance(other, list):
+            return list(self) == other
+        return super().__eq__(other)
+
+    __hash__ = None
+
+
+class Sink(Channel):
+    """Output channel that hands each value to `callback` instead of
+    keeping it, for long-running programs whose output is only streamed."""
+
+    def __init__(self, callback):
+        super().__init__()
+        self.callback = callback
+
+    def append(self, value):
+        self.callback(value)
+
+    def extend(self, values):
+        for value in values:
+            self.callback(value)
+
+    def __reduce__(self):
+        return type(self), (self.callback,)
+
+
+def connect(*computers, loop=False):
+    """Chain computers output-to-input, optionally closing the ring.
+
+    Values already queued on a downstream computer's inputs (e.g. phase
+    settings) stay at the front of the shared channel.
+    """
+    pairs = list(zip(computers, computers[1:]))
+    if loop:
+        pairs.append((computers[-1], computers[0]))
+
+    for source, target in pairs:
+        channel = target.inputs
+        channel.extend(source.outputs)
+        source.outputs = channel
+    return computers
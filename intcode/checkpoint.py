@@ -0,0 +1,81 @@
+import struct
+
+from .cells import pack_cells, unpack_cells
+from .computer import Computer
+from .memory import PAGE_SIZE, PagedMemory
+
+MAGIC = b'ICKP'
+VERSION = 1
+HEADER = struct.Struct('<4sHB')
+
+TERMINATED = 1
+WAITING = 2
+
+
+def dump_checkpoint(computer):
+    """Serialize a Computer's execution state to bytes.
+
+    The layout is a small header (magic, version, flags) followed by
+    pack_cells sections for the registers, the dense memory, the sparse
+    page numbers and contents, and the pending inputs and outputs. The VM
+    configuration (history, profiler, translate) is not part of it.
+    """
+    flags = (TERMINATED if computer.terminated else 0) | (WAITING if computer.waiting else 0)
+    pages = computer.memory.sparse_pages()
+    numbers = sorted(pages)
+    return b''.join([
+        HEADER.pack(MAGIC, VERSION, flags),
+        pack_cells([computer.index, computer.relative_base]),
+        pack_cells(computer.memory.dense),
+        pack_cells(numbers),
+        pack_cells([value for number in numbers for value in pages[number]]),
+        pack_cells(computer.inputs),
+        pack_cells(computer.outputs),
+    ])
+
+
+def parse_checkpoint(data, **kwargs):
+    """Build a Computer from dump_checkpoint() bytes.
+
+    Extra keyword arguments (e.g. translate=True) are passed to Computer.
+    Raises ValueError if `data` is not a checkpoint this version can read.
+    """
+    data = memoryview(data)
+    magic, version, flags = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('Not an Intcode checkpoint')
+    if version != VERSION:
+        raise ValueError('Unsupported checkpoint version %s' % version)
+
+    offset = HEADER.size
+    (index, relative_base), offset = unpack_cells(data, offset)
+    dense, offset = unpack_cells(data, offset)
+    numbers, offset = unpack_cells(data, offset)
+    contents, offset = unpack_cells(data, offset)
+    inputs, offset = unpack_cells(data, offset)
+    outputs, offset = unpack_cells(data, offset)
+
+    memory = PagedMemory(dense)
+    for position, number in enumerate(numbers):
+        memory.pages[number] = contents[position * PAGE_SIZE:(position + 1) * PAGE_SIZE]
+
+    return Computer(
+        memory=memory,
+        inputs=inputs,
+        outputs=outputs,
+        index=index,
+        relative_base=relative_base,
+        terminated=bool(flags & TERMINATED),
+        waiting=bool(flags & WAITING),
+        **kwargs
+    )
+
+
+def save_checkpoint(computer, path):
+    with open(path, 'wb') as f:
+        f.write(dump_checkpoint(computer))
+
+
+def load_checkpoint(path, **kwargs):
+    with open(path, 'rb') as f:
+        return parse_checkpoint(f.read(), **kwargs)
@@ -0,0 +1,389 @@
+import asyncio
+import time
+from typing import NamedTuple, Optional
+from pydantic import BaseModel, PrivateAttr, validator
+
+from .channels import Channel
+from .history import History
+from .instructions import ARITH_OPCODES, DECODE_TABLE, ModeEnum, get_codes
+from .memory import Memory, PagedMemory
+from .profiler import Profiler
+from .translate import Translator
+
+# Why the last run() returned.
+HALTED = 'halted'
+WAITING = 'waiting'
+OUT_OF_BUDGET = 'out of budget'
+TIMED_OUT = 'timed out'
+
+# With a budget or timeout set, limits are checked every this many
+# instructions (the budget itself is still exact).
+CHECK_INTERVAL = 1024
+
+# run_async() yields to the event loop after at most this many instructions.
+ASYNC_SLICE = 10000
+
+
+class Snapshot(NamedTuple):
+    memory: tuple
+    inputs: list
+    outputs: list
+    index: int
+    relative_base: int
+    terminated: bool
+    waiting: bool
+
+
+class Computer(BaseModel):
+    memory: Memory
+    history: History=History()
+    inputs: Channel=Channel()
+    outputs: Channel=Channel()
+    index: int=0
+    relative_base: int=0
+    terminated: bool=False
+    waiting: bool=False
+    translate: bool=False
+    profiler: Optional[Profiler]=None
+    # Limits on each run() call: instructions executed and seconds spent.
+    # Reaching one suspends the machine before its next instruction; run()
+    # again to resume with a fresh allowance.
+    budget: Optional[int]=None
+    timeout: Optional[float]=None
+    stop_reason: Optional[str]=None
+
+    _translator: Translator = PrivateAttr(default=None)
+    # Instructions the last limited run() executed.
+    _executed: int = PrivateAttr(default=0)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @validator('memory', pre=True)
+    def load_memory(cls, value):
+        if isinstance(value, Memory):
+            return value
+        return PagedMemory(value)
+
+    @validator('inputs', 'outputs', pre=True)
+    def load_channel(cls, value):
+        # An existing Channel is kept as-is so machines can share one.
+        if isinstance(value, Channel):
+            return value
+        return Channel(value)
+
+    def get_var(self, var, param_mode: ModeEnum):
+        if param_mode == ModeEnum.POSITION_MODE:
+            return self.memory.read(var)
+        elif param_mode == ModeEnum.IMMEDIATE_MODE:
+            return var
+        elif param_mode == ModeEnum.RELATIVE_MODE:
+            return self.memory.read(self.relative_base + var)
+
+    def get_address(self, var, param_mode: ModeEnum):
+        if param_mode == ModeEnum.POSITION_MODE:
+            return var
+        elif param_mode == ModeEnum.RELATIVE_MODE:
+            return self.relative_base + var
+
+    def set_address(self, address, value, param_mode: ModeEnum):
+        self.memory.write(self.get_address(address, param_mode), value)
+
+    def snapshot(self):
+        return Snapshot(
+            memory=self.memory.snapshot(),
+            inputs=list(self.inputs),
+            outputs=list(self.outputs),
+            index=self.index,
+            relative_base=self.relative_base,
+            terminated=self.terminated,
+            waiting=self.waiting,
+        )
+
+    def restore(self, snapshot: Snapshot):
+        """Reset to `snapshot` in place: no model validation, and the
+        memory and I/O channels are refilled rather than reallocated."""
+        self.memory.restore(snapshot.memory)
+        self.inputs.clear()
+        self.inputs.extend(snapshot.inputs)
+        self.outputs.clear()
+        self.outputs.extend(snapshot.outputs)
+        self.index = snapshot.index
+        self.relative_base = snapshot.relative_base
+        self.terminated = snapshot.terminated
+        self.waiting = snapshot.waiting
+
+    def fork(self):
+        """A copy of this Computer, sharing nothing mutable with it.
+
+        Channels are copied; history and profiler are not carried over.
+        With CowMemory the memory is forked in time proportional to the
+        pages written so far, not the program size.
+        """
+        return Computer(
+            memory=self.memory.fork(),
+            inputs=list(self.inputs),
+            outputs=list(self.outputs),
+            index=self.index,
+            relative_base=self.relative_base,
+            terminated=self.terminated,
+            waiting=self.waiting,
+            translate=self.translate,
+            budget=self.budget,
+            timeout=self.timeout,
+        )
+
+    async def run_async(self, inputs: asyncio.Queue, outputs: asyncio.Queue):
+        """Run inside an event loop: input awaits `inputs`, output is put
+        onto `outputs`, waiting for room if the queue is bounded.
+
+        Values already queued on the Computer's own channels are used first.
+        The program runs in slices of ASYNC_SLICE instructions, handing its
+        output over and yielding to the loop after each, so a machine that
+        only computes doesn't hold up other tasks. `budget` and `timeout`
+        bound the whole call. Returns when the program halts or hits one of
+        them. Slices are counted by the interpreter, so `translate` has no
+        effect here.
+        """
+        channel = self.outputs
+        budget = self.budget
+        timeout = self.timeout
+        deadline = None
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+
+        remaining = budget
+        try:
+            while True:
+                self.budget = ASYNC_SLICE if remaining is None else min(ASYNC_SLICE, remaining)
+                if deadline is not None:
+                    self.timeout = max(0.0, deadline - time.monotonic())
+                self.run()
+                if remaining is not None:
+                    remaining -= self._executed
+
+                while channel:
+                    await outputs.put(channel.popleft())
+
+                if self.stop_reason == WAITING:
+                    self.inputs.append(await inputs.get())
+                elif self.stop_reason == OUT_OF_BUDGET and remaining != 0:
+                    await asyncio.sleep(0)
+                else:
+                    return self
+        finally:
+            self.budget = budget
+            self.timeout = timeout
+
+    def run(self):
+        """Run until the program halts, needs input it doesn't have, or
+        uses up its budget or timeout; `stop_reason` says which."""
+        self.stop_reason = None
+        # Recording history or a profile, or counting instructions for the
+        # limits, needs the interpreter's per-instruction view.
+        if (self.translate and not self.history.enabled and self.profiler is None
+                and self.budget is None and self.timeout is None):
+            if self._translator is None:
+                self._translator = Translator(self)
+            self._translator.run()
+        else:
+            self.interpret()
+
+        if self.stop_reason is None:
+            self.stop_reason = HALTED if self.terminated else WAITING
+
+    def interpret(self, one_block=False):
+        """Run on the interpreter; with `one_block`, only up to and
+        including the next jump or input, as the translator's fallback."""
+        if self.terminated:
+            return
+
+        # Plain-int interpreter: decode through DECODE_TABLE and act on the
+        # dense memory list directly, no per-step Instruction models.
+        # Addresses outside the dense region go through the backend; that
+        # includes negative ones, which must not wrap around the list.
+        # The dense list may be extended in place by write(), so size is
+        # refreshed after every slow-path write. A compact backend may also
+        # replace it when a value overflows (see ArrayMemory): a fast-path
+        # store that overflows goes through write() instead, and dense is
+        # re-fetched along with size.
+        memory = self.memory
+        dense = memory.dense
+        size = len(dense)
+        read = memory.read
+        write = memory.write
+        inputs = self.inputs
+        outputs = self.outputs
+        index = self.index
+        relative_base = self.relative_base
+        position_mode = ModeEnum.POSITION_MODE.value
+        relative_mode = ModeEnum.RELATIVE_MODE.value
+        record = self.history.record if self.history.enabled else None
+        profile = self.profiler.record if self.profiler is not None else None
+        limited = self.budget is not None or self.timeout is not None
+        tracing = record is not None or profile is not None or limited
+        waiting = False
+        stop_reason = None
+        decode_table = DECODE_TABLE
+        if profile is not None:
+            self.profiler.start()
+
+        if limited:
+            steps = 0
+            budget = self.budget if self.budget is not None else float('inf')
+            deadline = None
+            if self.timeout is not None:
+                deadline = time.monotonic() + self.timeout
+            check_at = min(CHECK_INTERVAL, budget)
+
+        while True:
+            word = dense[index] if 0 <= index < size else read(index)
+            if tracing:
+                if limited:
+                    if steps >= check_at:
+                        if steps >= budget:
+                            stop_reason = OUT_OF_BUDGET
+                            break
+                        if deadline is not None and time.monotonic() >= deadline:
+                            stop_reason = TIMED_OUT
+                            break
+                        check_at = min(steps + CHECK_INTERVAL, budget)
+                    steps += 1
+                # An input is recorded once it has a value to read, so one
+                # that suspends the run isn't logged again on resume.
+                if record is not None and word % 100 != 3:
+                    record((index, memory.cells(index, index + 4)))
+                if profile is not None:
+                    profile(index, word)
+
+            codes = decode_table.get(word)
+            if codes is None:
+                codes = get_codes(word)
+            opcode, mode_1, mode_2, mode_3 = codes
+
+            if opcode in ARITH_OPCODES:
+                var_1 = dense[index + 1] if 0 <= index + 1 < size else read(index + 1)
+                if mode_1 == position_mode:
+                    var_1 = dense[var_1] if 0 <= var_1 < size else read(var_1)
+                elif mode_1 == relative_mode:
+                    var_1 += relative_base
+                    var_1 = dense[var_1] if 0 <= var_1 < size else read(var_1)
+
+                var_2 = dense[index + 2] if 0 <= index + 2 < size else read(index + 2)
+                if mode_2 == position_mode:
+                    var_2 = dense[var_2] if 0 <= var_2 < size else read(var_2)
+                elif mode_2 == relative_mode:
+                    var_2 += relative_base
+                    var_2 = dense[var_2] if 0 <= var_2 < size else read(var_2)
+
+                address = dense[index + 3] if 0 <= index + 3 < size else read(index + 3)
+                if mode_3 == relative_mode:
+                    address += relative_base
+
+                if opcode == 1:
+                    value = var_1 + var_2
+                elif opcode == 2:
+                    value = var_1 * var_2
+                elif opcode == 7:
+                    value = int(var_1 < var_2)
+                else:
+                    value = int(var_1 == var_2)
+
+                if 0 <= address < size:
+                    try:
+                        dense[address] = value
+                    except OverflowError:
+                        write(address, value)
+                        dense = memory.dense
+                else:
+                    write(address, value)
+                    dense = memory.dense
+                    size = len(dense)
+                index += 4
+
+            elif opcode == 5 or opcode == 6:
+                var_1 = dense[index + 1] if 0 <= index + 1 < size else read(index + 1)
+                if mode_1 == position_mode:
+                    var_1 = dense[var_1] if 0 <= var_1 < size else read(var_1)
+                elif mode_1 == relative_mode:
+                    var_1 += relative_base
+                    var_1 = dense[var_1] if 0 <= var_1 < size else read(var_1)
+
+                if bool(var_1) == (opcode == 5):
+                    var_2 = dense[index + 2] if 0 <= index + 2 < size else read(index + 2)
+                    if mode_2 == position_mode:
+                        var_2 = dense[var_2] if 0 <= var_2 < size else read(var_2)
+                    elif mode_2 == relative_mode:
+                        var_2 += relative_base
+                        var_2 = dense[var_2] if 0 <= var_2 < size else read(var_2)
+                    index = var_2
+                else:
+                    index += 3
+                if one_block:
+                    break
+
+            elif opcode == 3:
+                if not inputs and not inputs.refill():
+                    waiting = True
+                    break
+                if record is not None:
+                    record((index, memory.cells(index, index + 4)))
+
+                address = dense[index + 1] if 0 <= index + 1 < size else read(index + 1)
+                if mode_1 == relative_mode:
+                    address += relative_base
+
+                value = inputs.popleft()
+                if 0 <= address < size:
+                    try:
+                        dense[address] = value
+                    except OverflowError:
+                        write(address, value)
+                        dense = memory.dense
+                else:
+                    write(address, value)
+                    dense = memory.dense
+                    size = len(dense)
+                index += 2
+                if one_block:
+                    break
+
+            elif opcode == 4 or opcode == 9:
+                var_1 = dense[index + 1] if 0 <= index + 1 < size else read(index + 1)
+                if mode_1 == position_mode:
+                    var_1 = dense[var_1] if 0 <= var_1 < size else read(var_1)
+                elif mode_1 == relative_mode:
+                    var_1 += relative_base
+                    var_1 = dense[var_1] if 0 <= var_1 < size else read(var_1)
+
+                if opcode == 4:
+                    outputs.append(var_1)
+                else:
+                    relative_base += var_1
+                index += 2
+
+            elif opcode == 99:
+                self.terminated = True
+                index += 1
+                break
+
+            else:
+                raise ValueError(
+                    'Unknown opcode %s at address %s' % (opcode, index)
+                )
+
+        if profile is not None:
+            self.profiler.stop()
+        if limited:
+            self._executed = steps
+        self.index = index
+        self.relative_base = relative_base
+        self.waiting = waiting
+        self.stop_reason = stop_reason
+
+
+def create_and_run(codes, inputs=None):
+    inputs = inputs or []
+    computer = Computer(memory=codes.copy(), inputs=inputs)
+    computer.run()
+    return computer
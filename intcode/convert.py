@@ -0,0 +1,24 @@
+"""Convert an Intcode program to the binary format:
+
+    python -m intcode.convert day09/input.txt day09/input.icpg
+
+load_program() reads either format.
+"""
+import argparse
+
+from .program import convert_program
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Convert an Intcode program to the binary format',
+    )
+    parser.add_argument('source')
+    parser.add_argument('target')
+    args = parser.parse_args(argv)
+
+    convert_program(args.source, args.target)
+
+
+if __name__ == '__main__':
+    main()
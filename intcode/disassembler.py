@@ -0,0 +1,333 @@
+"""Static disassembly and control-flow analysis of Intcode programs.
+
+    python -m intcode.disassembler day09/input.txt
+    python -m intcode.disassembler day09/input.txt --dot cfg.dot
+
+Only the initial memory image is analysed: code reached through a jump
+whose target is read from memory, or code the program writes at run time,
+is outside what this can see, and is reported as such rather than guessed.
+"""
+import argparse
+from typing import List, NamedTuple, Optional, Tuple
+
+from .instructions import INSTRUCTION_WIDTHS, MNEMONICS, ModeEnum, get_codes, instructionMap
+from .program import load_program
+
+JUMP_OPCODES = (5, 6)
+# Operand positions (0-based) each opcode writes through.
+WRITE_OPERANDS = {1: 2, 2: 2, 3: 0, 7: 2, 8: 2}
+
+
+class DecodedInstruction(NamedTuple):
+    address: int
+    opcode: int
+    modes: Tuple[ModeEnum, ...]
+    operands: Tuple[int, ...]
+
+    @property
+    def mnemonic(self):
+        return MNEMONICS[self.opcode]
+
+    @property
+    def width(self):
+        return INSTRUCTION_WIDTHS[self.opcode]
+
+    @property
+    def end(self):
+        return self.address + self.width
+
+    def jump_target(self):
+        """The target of a jump with an immediate target, else None."""
+        if self.opcode in JUMP_OPCODES and self.modes[1] == ModeEnum.IMMEDIATE_MODE:
+            return self.operands[1]
+        return None
+
+    def taken(self):
+        """Whether a jump with an immediate condition always (True) or
+        never (False) jumps, e.g. `jt 1, ...`; None if it depends on memory."""
+        if self.opcode in JUMP_OPCODES and self.modes[0] == ModeEnum.IMMEDIATE_MODE:
+            return bool(self.operands[0]) == (self.opcode == 5)
+        return None
+
+    def can_jump(self):
+        return self.opcode in JUMP_OPCODES and self.taken() is not False
+
+    def falls_through(self):
+        return self.opcode != 99 and self.taken() is not True
+
+    def write_address(self):
+        """The address a position-mode write goes to, else None."""
+        position = WRITE_OPERANDS.get(self.opcode)
+        if position is not None and self.modes[position] == ModeEnum.POSITION_MODE:
+            return self.operands[position]
+        return None
+
+    def __str__(self):
+        return ('%6d: %-4s %s' % (
+            self.address,
+            self.mnemonic,
+            ', '.join(
+                format_operand(operand, mode)
+                for operand, mode in zip(self.operands, self.modes)
+            ),
+        )).rstrip()
+
+
+def format_operand(operand, mode):
+    if mode == ModeEnum.POSITION_MODE:
+        return '[%d]' % operand
+    if mode == ModeEnum.RELATIVE_MODE:
+        return '[rb%+d]' % operand
+    return '%d' % operand
+
+
+def decode_at(program, address):
+    """Decode the instruction at `address`, or None if it isn't one."""
+    if not 0 <= address < len(program):
+        return None
+
+    word = program[address]
+    try:
+        opcode, *modes = get_codes(word)
+    except ValueError:
+        return None
+    if opcode not in instructionMap:
+        return None
+
+    count = INSTRUCTION_WIDTHS[opcode] - 1
+    operands = tuple(program[address + 1:address + 1 + count])
+    if len(operands) < count:
+        return None
+    return DecodedInstruction(address, opcode, tuple(modes[:count]), operands)
+
+
+class BasicBlock(NamedTuple):
+    start: int
+    instructions: List[DecodedInstruction]
+    # Addresses control can go to next. None stands for a jump whose target
+    # is only known at run time.
+    successors: List[Optional[int]]
+
+    @property
+    def end(self):
+        return self.instructions[-1].end
+
+
+class Analysis:
+    """Reachable instructions, basic blocks and code/data split of a program.
+
+    Instructions are found by following control flow from `entry`: fall
+    through, both sides of every conditional jump with an immediate target,
+    only the side a constant condition picks, and nothing past a halt.
+    Cells covered by a reachable instruction are code; all others are data.
+    """
+
+    def __init__(self, program, entry=0):
+        self.program = list(program)
+        self.entry = entry
+        self.instructions = {}
+        # Reachable addresses that don't hold a valid instruction, e.g. day05's
+        # 1100 at address 6, which the program patches before reaching it.
+        self.invalid = set()
+        # Jumps whose target comes from memory.
+        self.indirect = set()
+        self.explore()
+        self.blocks = self.build_blocks()
+
+    def explore(self):
+        pending = [self.entry]
+        while pending:
+            address = pending.pop()
+            while address not in self.instructions:
+                instruction = decode_at(self.program, address)
+                if instruction is None:
+                    self.invalid.add(address)
+                    break
+
+                self.instructions[address] = instruction
+                if instruction.can_jump():
+                    target = instruction.jump_target()
+                    if target is None:
+                        self.indirect.add(address)
+                    else:
+                        pending.append(target)
+                if not instruction.falls_through():
+                    break
+                address = instruction.end
+
+    def leaders(self):
+        leaders = {self.entry}
+        for instruction in self.instructions.values():
+            if instruction.opcode in JUMP_OPCODES:
+                leaders.add(instruction.end)
+                if instruction.can_jump() and instruction.jump_target() is not None:
+                    leaders.add(instruction.jump_target())
+        return leaders & set(self.instructions)
+
+    def build_blocks(self):
+        blocks = {}
+        leaders = self.leaders()
+        for start in sorted(leaders):
+            instructions = []
+            address = start
+            while address in self.instructions:
+                instruction = self.instructions[address]
+                instructions.append(instruction)
+                address = instruction.end
+                if instruction.opcode in JUMP_OPCODES or instruction.opcode == 99:
+                    break
+                if address in leaders:
+                    break
+
+            last = instructions[-1]
+            successors = []
+            if last.falls_through() and last.end in self.instructions:
+                successors.append(last.end)
+            if last.can_jump():
+                successors.append(last.jump_target())
+            blocks[start] = BasicBlock(start, instructions, successors)
+        return blocks
+
+    def code(self):
+        """Addresses of every cell belonging to a reachable instruction."""
+        return {
+            address
+            for instruction in self.instructions.values()
+            for address in range(instruction.address, instruction.end)
+        }
+
+    def data(self):
+        code = self.code()
+        return [address for address in range(len(self.program)) if address not in code]
+
+    def self_modifying(self):
+        """Instructions whose position-mode write lands in code, or on a
+        reached address that only becomes an instruction once written, as
+        {writer address: written address}."""
+        code = self.code() | self.invalid
+        return {
+            instruction.address: instruction.write_address()
+            for instruction in self.instructions.values()
+            if instruction.write_address() in code
+        }
+
+    def loops(self):
+        """Back edges (source block, head block): a jump to a block at or
+        before it. Their heads are where hot loops are likely to be."""
+        return sorted(
+            (block.start, successor)
+            for block in self.blocks.values()
+            for successor in block.successors
+            if successor is not None and successor <= block.start
+        )
+
+    def listing(self):
+        """Disassembly in address order, data cells shown as raw values."""
+        code = self.code() | self.invalid
+        heads = {head for _, head in self.loops()}
+        writers = {
+            instruction.write_address(): instruction.address
+            for instruction in self.instructions.values()
+        }
+        lines = []
+        address = 0
+        while address < len(self.program):
+            if address in self.blocks:
+                label = 'block %d' % address
+                if address in heads:
+                    label += ' (loop head)'
+                lines.append('%s:' % label)
+            if address in self.instructions:
+                instruction = self.instructions[address]
+                note = ''
+                if address in self.indirect:
+                    note = '  ; indirect jump'
+                elif instruction.write_address() in code:
+                    note = '  ; writes code'
+                lines.append('%s%s' % (instruction, note))
+                address = instruction.end
+            else:
+                note = ''
+                if address in self.invalid:
+                    note = '  ; reached, but not an instruction'
+                    if address in writers:
+                        note += ' until written by %d' % writers[address]
+                lines.append('%6d: data %d%s' % (address, self.program[address], note))
+                address += 1
+        return '\n'.join(lines)
+
+    def to_dot(self):
+        """The control-flow graph in Graphviz dot format."""
+        lines = ['digraph intcode {', '    node [shape=box, fontname=monospace];']
+        for block in self.blocks.values():
+            label = '\\l'.join(str(instruction).strip() for instruction in block.instructions)
+            lines.append('    b%d [label="%s\\l"];' % (block.start, label))
+            for successor in block.successors:
+                if successor is None:
+                    lines.append('    b%d -> indirect;' % block.start)
+                elif successor in self.blocks:
+                    lines.append('    b%d -> b%d;' % (block.start, successor))
+        if self.indirect:
+            lines.append('    indirect [shape=ellipse, label="?"];')
+        lines.append('}')
+        return '\n'.join(lines) + '\n'
+
+
+def disassemble(program, entry=0):
+    return Analysis(program, entry).listing()
+
+
+# Jumps over two data cells with a constant condition, outputs 5, and jumps
+# again to address 14, which the first instruction patches into a halt.
+PATCHED_HALT = [1101, 0, 99, 14, 1105, 1, 9, 98, 0, 104, 5, 1106, 0, 14, 0]
+
+
+def check():
+    analysis = Analysis(PATCHED_HALT)
+    assert sorted(analysis.instructions) == [0, 4, 9, 11]
+    assert analysis.invalid == {14}
+    assert analysis.data() == [7, 8, 14]
+    assert analysis.self_modifying() == {0: 14}
+    assert {start: block.successors for start, block in analysis.blocks.items()} == {
+        0: [9], 9: [14],
+    }
+    assert analysis.loops() == []
+    assert analysis.listing().splitlines() == [
+        'block 0:',
+        '     0: add  0, 99, [14]  ; writes code',
+        '     4: jt   1, 9',
+        '     7: data 98',
+        '     8: data 0',
+        'block 9:',
+        '     9: out  5',
+        '    11: jf   0, 14',
+        '    14: data 0  ; reached, but not an instruction until written by 0',
+    ]
+    assert '    b0 -> b9;' in analysis.to_dot().splitlines()
+
+    # A loop counting mem[11] down, then a return through the relative
+    # base: the halt after it is never reached.
+    analysis = Analysis([1001, 11, -1, 11, 1005, 11, 0, 2105, 1, 0, 99, 3])
+    assert analysis.loops() == [(0, 0)]
+    assert analysis.indirect == {7}
+    assert analysis.blocks[7].successors == [None]
+    assert analysis.data() == [10, 11]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Disassemble an Intcode program')
+    parser.add_argument('program')
+    parser.add_argument('--entry', type=int, default=0)
+    parser.add_argument('--dot', help='write the control-flow graph here')
+    args = parser.parse_args(argv)
+
+    check()
+    analysis = Analysis(load_program(args.program), args.entry)
+    print(analysis.listing())
+    if args.dot:
+        with open(args.dot, 'w') as f:
+            f.write(analysis.to_dot())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+from collections import deque
+
+
+class History:
+    """Instruction history policy: the base class records nothing."""
+    enabled = False
+
+    def record(self, entry):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self):
+        return iter(())
+
+    def __repr__(self):
+        return '%s()' % type(self).__name__
+
+
+class RingHistory(History):
+    """Keeps the last `size` executed instructions for crash diagnostics."""
+    enabled = True
+
+    def __init__(self, size=100):
+        self.entries = deque(maxlen=size)
+
+    def record(self, entry):
+        self.entries.append(entry)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __repr__(self):
+        return repr(list(self.entries))
+
+
+class FileHistory(History):
+    """Streams every executed instruction to a file, one per line.
+
+    Use it as a context manager (or call close()) to flush and close the
+    file once the runs it records are done.
+    """
+    enabled = True
+
+    def __init__(self, path):
+        self.file = open(path, 'w')
+
+    def record(self, entry):
+        self.file.write('%s\n' % (entry,))
+
+    def close(self):
+        self.file.close()
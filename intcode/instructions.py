@@ -0,0 +1,175 @@
+from enum import IntEnum
+from pydantic import BaseModel
+
+
+class Instruction(BaseModel):
+    opcode: int
+    address: int
+
+    def assign_operate(self):
+        return RanInstruction(
+            instruction=self,
+            result=0,
+        )
+
+    def get_next_index(self, old_index):
+        return old_index + self.next_step
+
+
+class TerminateInstruction(Instruction):
+    next_step = 1
+
+
+class IOInstruction(Instruction):
+    next_step = 2
+
+
+class InputInstruction(IOInstruction):
+    save_address: int
+    input_val: int
+
+
+class OutputInstruction(IOInstruction):
+    output_value: int
+
+
+class ArithInstruction(Instruction):
+    noun: int
+    verb: int
+    output_address: int
+    next_step = 4
+
+    def assign_operate(self):
+        return RanInstruction(
+            instruction=self,
+            result=self.operate(),
+        )
+
+
+class AddInstruction(ArithInstruction):
+    def operate(self):
+        return self.noun + self.verb
+
+
+class MulInstruction(ArithInstruction):
+    def operate(self):
+        return self.noun * self.verb
+
+
+class LessThanInstruction(ArithInstruction):
+    def operate(self):
+        return int(self.noun < self.verb)
+
+
+class EqualsInstruction(ArithInstruction):
+    def operate(self):
+        return int(self.noun == self.verb)
+
+
+class JumpInstruction(Instruction):
+    condition: int
+    jump_address: int
+    next_step = 3
+
+    def get_next_index(self, old_index):
+        if self.condition_passes():
+            return self.jump_address
+        else:
+            return super().get_next_index(old_index)
+
+
+class JumpIfTrueInstruction(JumpInstruction):
+    def condition_passes(self):
+        return bool(self.condition)
+
+
+class JumpIfFalseInstruction(JumpInstruction):
+    def condition_passes(self):
+        return not bool(self.condition)
+
+
+class AdjustRelativeInstruction(Instruction):
+    next_step = 2
+    relative_add: int
+
+
+class RanInstruction(BaseModel):
+    instruction: Instruction
+    result: int
+
+
+instructionMap = {
+    1: AddInstruction,
+    2: MulInstruction,
+    3: InputInstruction,
+    4: OutputInstruction,
+    5: JumpIfTrueInstruction,
+    6: JumpIfFalseInstruction,
+    7: LessThanInstruction,
+    8: EqualsInstruction,
+    9: AdjustRelativeInstruction,
+    99: TerminateInstruction,
+}
+
+ARITH_OPCODES = (1, 2, 7, 8)
+
+# Instruction length in cells, opcode included. pydantic turns the
+# next_step class attributes into fields, so read them from there.
+INSTRUCTION_WIDTHS = {
+    opcode: instruction.__fields__['next_step'].default
+    for opcode, instruction in instructionMap.items()
+}
+
+MNEMONICS = {
+    1: 'add',
+    2: 'mul',
+    3: 'in',
+    4: 'out',
+    5: 'jt',
+    6: 'jf',
+    7: 'lt',
+    8: 'eq',
+    9: 'arb',
+    99: 'halt',
+}
+
+
+class ModeEnum(IntEnum):
+    POSITION_MODE = 0
+    IMMEDIATE_MODE = 1
+    RELATIVE_MODE = 2
+
+
+def get_digit(number, digit):
+    return number // 10**digit % 10
+
+
+def get_codes(instruction_code):
+    opcode = instruction_code % 100
+    param_mode_1 = ModeEnum(get_digit(instruction_code, 2))
+    param_mode_2 = ModeEnum(get_digit(instruction_code, 3))
+    param_mode_3 = ModeEnum(get_digit(instruction_code, 4))
+
+    return opcode, param_mode_1, param_mode_2, param_mode_3
+
+
+# Every well-formed instruction word decoded up front. Keyed on the word
+# itself rather than its address, so self-modifying writes can never leave a
+# stale decode behind. Modes are stored as plain ints for the interpreter.
+DECODE_TABLE = {
+    word: tuple(int(code) for code in get_codes(word))
+    for word in (
+        opcode + 100 * mode_1 + 1000 * mode_2 + 10000 * mode_3
+        for opcode in tuple(instructionMap)
+        for mode_1 in tuple(ModeEnum)
+        for mode_2 in tuple(ModeEnum)
+        for mode_3 in tuple(ModeEnum)
+    )
+}
+
+
+def decode(instruction_code):
+    codes = DECODE_TABLE.get(instruction_code)
+    if codes is None:
+        codes = get_codes(instruction_code)
+    return codes
@@ -0,0 +1,367 @@
+from array import array
+
+PAGE_BITS = 10
+PAGE_SIZE = 1 << PAGE_BITS
+PAGE_MASK = PAGE_SIZE - 1
+
+
+class Memory:
+    """Memory backend interface.
+
+    `dense` is a plain list covering addresses [0, len(dense)) that the
+    interpreter indexes directly; every other address goes through
+    read/write. Untouched cells read as 0.
+    """
+
+    def __init__(self, image=()):
+        self.dense = list(image)
+
+    def read(self, address):
+        raise NotImplementedError
+
+    def write(self, address, value):
+        raise NotImplementedError
+
+    def __getitem__(self, address):
+        return self.read(address)
+
+    def __setitem__(self, address, value):
+        self.write(address, value)
+
+    # read() answers for any address, so iterating through __getitem__
+    # would never end. Iteration covers the cells to_list() would hold,
+    # lazily; len(), == and repr() work from the dense region and the
+    # allocated pages, so a far page doesn't build every cell below it.
+    def __iter__(self):
+        size = len(self)
+        yield from self.dense
+        for address in range(len(self.dense), size):
+            yield self.read(address)
+
+    def __len__(self):
+        return max(stop for _, stop in self.segments())
+
+    def segments(self):
+        """(start, stop) ranges of allocated cells; every cell outside
+        them reads 0."""
+        return [(0, len(self.dense))] + [
+            (number << PAGE_BITS, (number + 1) << PAGE_BITS)
+            for number in sorted(self.sparse_pages())
+        ]
+
+    def cells(self, start, stop):
+        return [self.read(address) for address in range(start, stop)]
+
+    def to_list(self):
+        return list(self.dense)
+
+    def sparse_pages(self):
+        """Cells held outside `dense`, as {page number: PAGE_SIZE cells}."""
+        return {}
+
+    def snapshot(self):
+        raise NotImplementedError
+
+    def restore(self, snapshot):
+        raise NotImplementedError
+
+    def fork(self):
+        """An independent memory with the same contents."""
+        memory = type(self)()
+        memory.restore(self.snapshot())
+        return memory
+
+    def __eq__(self, other):
+        if isinstance(other, Memory):
+            if len(self) != len(other):
+                return False
+            return all(
+                self.cells(start, stop) == other.cells(start, stop)
+                for start, stop in self.segments() + other.segments()
+            )
+        if isinstance(other, (list, tuple)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        pages = self.sparse_pages()
+        if not pages:
+            return '%s(%s)' % (type(self).__name__, list(self.dense))
+        return '%s(%s, pages=%s)' % (
+            type(self).__name__,
+            list(self.dense),
+            {number: list(pages[number]) for number in sorted(pages)},
+        )
+
+
+class PagedMemory(Memory):
+    """Program image held densely, far addresses in sparse fixed-size pages.
+
+    Writes just past the dense region (e.g. a stack above the program) grow
+    it to the next page boundary so they stay on the fast path; anything
+    further out lands in a page that is only allocated on first write.
+    """
+
+    def __init__(self, image=()):
+        super().__init__(image)
+        self.pages = {}
+
+    def read(self, address):
+        if 0 <= address < len(self.dense):
+            return self.dense[address]
+        if address < 0:
+            raise IndexError('Negative address %s' % address)
+
+        page = self.pages.get(address >> PAGE_BITS)
+        if page is None:
+            return 0
+        return page[address & PAGE_MASK]
+
+    def write(self, address, value):
+        if 0 <= address < len(self.dense):
+            self.dense[address] = value
+            return
+        if address < 0:
+            raise IndexError('Negative address %s' % address)
+
+        if address < 2 * len(self.dense) + PAGE_SIZE:
+            self.grow(address + 1)
+            self.dense[address] = value
+            return
+
+        page = self.pages.get(address >> PAGE_BITS)
+        if page is None:
+            page = self.pages[address >> PAGE_BITS] = self.new_page()
+        page[address & PAGE_MASK] = value
+
+    def new_page(self):
+        return [0] * PAGE_SIZE
+
+    def grow(self, end):
+        # Round up to a page boundary so every page the dense region now
+        # covers can be folded in and dropped.
+        end = (end + PAGE_MASK) & ~PAGE_MASK
+        start = len(self.dense)
+        self.dense.extend(self.cells(start, end))
+        for number in range(start >> PAGE_BITS, end >> PAGE_BITS):
+            self.pages.pop(number, None)
+
+    def sparse_pages(self):
+        return self.pages
+
+    def snapshot(self):
+        return (
+            list(self.dense),
+            {number: list(page) for number, page in self.pages.items()},
+        )
+
+    def restore(self, snapshot):
+        # Overwrite the dense list in place rather than rebinding it, so
+        # anything holding a reference to it stays valid.
+        dense, pages = snapshot
+        self.dense[:] = dense
+        self.pages = {number: list(page) for number, page in pages.items()}
+
+    def to_list(self):
+        if not self.pages:
+            return list(self.dense)
+
+        end = (max(self.pages) + 1) << PAGE_BITS
+        return self.cells(0, max(end, len(self.dense)))
+
+
+class ArrayMemory(PagedMemory):
+    """PagedMemory storing cells as int64 in array('q') instead of lists.
+
+    Every cell costs 8 bytes rather than a pointer plus, for values above
+    256, an int object. A value that doesn't fit int64 promotes just the
+    storage it lands in to a list: the sparse page holding it, or the
+    whole dense region (which the interpreter indexes as one block). Reads
+    and writes on an array are slower than on a list, so this trades
+    speed for footprint and isn't the default.
+
+    Promotion replaces `dense`; the interpreter and translator pick up the
+    new one after any write that can promote.
+    """
+
+    def __init__(self, image=()):
+        super().__init__()
+        try:
+            self.dense = array('q', image)
+        except OverflowError:
+            self.dense = list(image)
+
+    def write(self, address, value):
+        try:
+            super().write(address, value)
+        except OverflowError:
+            self.promote(address)
+            super().write(address, value)
+
+    def new_page(self):
+        return array('q', bytes(8 * PAGE_SIZE))
+
+    def promote(self, address):
+        # Same split as PagedMemory.write: near addresses live in (or grow)
+        # the dense region, far ones in a page.
+        if address < 2 * len(self.dense) + PAGE_SIZE:
+            self.dense = list(self.dense)
+        else:
+            number = address >> PAGE_BITS
+            self.pages[number] = list(self.pages[number])
+
+    def snapshot(self):
+        return (
+            self.dense[:],
+            {number: page[:] for number, page in self.pages.items()},
+        )
+
+    def restore(self, snapshot):
+        # In place while the snapshot has the same storage as now; after a
+        # promotion (either way) `dense` is replaced.
+        dense, pages = snapshot
+        if type(dense) is type(self.dense):
+            self.dense[:] = dense
+        else:
+            self.dense = dense[:]
+        self.pages = {number: page[:] for number, page in pages.items()}
+
+
+class CowMemory(Memory):
+    """Copy-on-write view of a shared, immutable program image.
+
+    Nothing is copied up front: reads fall through to `image` until a page
+    is first written, at which point only that page is copied into
+    `pages`. fork() and snapshot() share every page with the copy and only
+    copy the page dict, so they cost O(dirty pages) whatever the size of
+    the program, and a thousand forks of one image hold one image between
+    them.
+
+    Accesses through read/write are slower than the interpreter's dense
+    fast path, so once a view has written to half of the image's pages it
+    stops sharing: the image is copied into `dense` and later forks copy
+    it too.
+    """
+
+    def __init__(self, image=(), pages=None):
+        self.dense = []
+        self.image = image if isinstance(image, tuple) else tuple(image)
+        self.image_pages = (len(self.image) + PAGE_MASK) >> PAGE_BITS
+        self.pages = dict(pages or {})
+        # Pages this view may modify; any other page is shared.
+        self.owned = set()
+        # to_list() length: the image, or the end of the furthest page
+        # written past it.
+        self.end = len(self.image)
+        if self.pages:
+            self.end = max(self.end, (max(self.pages) + 1) << PAGE_BITS)
+
+    @classmethod
+    def from_memory(cls, memory):
+        """A copy-on-write base over another backend's current contents,
+        e.g. a Computer loaded from a checkpoint, to fork machines from.
+        A plain list of cells is taken as the image."""
+        if isinstance(memory, CowMemory):
+            return memory.fork()
+        if not isinstance(memory, Memory):
+            return cls(memory)
+        return cls(memory.dense, {
+            number: list(page) for number, page in memory.sparse_pages().items()
+        })
+
+    def read(self, address):
+        if 0 <= address < len(self.dense):
+            return self.dense[address]
+        page = self.pages.get(address >> PAGE_BITS)
+        if page is not None:
+            return page[address & PAGE_MASK]
+        if address < 0:
+            raise IndexError('Negative address %s' % address)
+        if address < len(self.image):
+            return self.image[address]
+        return 0
+
+    def write(self, address, value):
+        if 0 <= address < len(self.dense):
+            self.dense[address] = value
+            return
+
+        number = address >> PAGE_BITS
+        if number not in self.owned:
+            if address < 0:
+                raise IndexError('Negative address %s' % address)
+            if (not self.dense and number < self.image_pages
+                    and 2 * (len(self.owned) + 1) >= self.image_pages):
+                self.materialize()
+                if address < len(self.dense):
+                    self.dense[address] = value
+                    return
+
+            page = self.pages.get(number)
+            if page is None:
+                start = number << PAGE_BITS
+                page = list(self.image[start:start + PAGE_SIZE])
+                page.extend([0] * (PAGE_SIZE - len(page)))
+            else:
+                page = list(page)
+            self.pages[number] = page
+            self.owned.add(number)
+
+        if address >= self.end:
+            self.end = (number + 1) << PAGE_BITS
+        self.pages[number][address & PAGE_MASK] = value
+
+    def materialize(self):
+        # Replaces `dense`; the interpreter re-fetches it after slow writes.
+        # A page straddling the end of the image stays, for the cells past
+        # it; dense shadows the rest of that page.
+        size = len(self.image)
+        dense = list(self.image)
+        for number in range(self.image_pages):
+            page = self.pages.get(number)
+            if page is not None:
+                start = number << PAGE_BITS
+                dense[start:start + PAGE_SIZE] = page[:size - start]
+        self.dense = dense
+        for number in range(size >> PAGE_BITS):
+            self.pages.pop(number, None)
+            self.owned.discard(number)
+
+    def fork(self):
+        fork = CowMemory(self.image, self.pages)
+        fork.dense = list(self.dense)
+        fork.end = self.end
+        self.owned = set()
+        return fork
+
+    def sparse_pages(self):
+        numbers = set(range(len(self.dense) >> PAGE_BITS, self.image_pages))
+        numbers.update(self.pages)
+        return {
+            number: self.cells(number << PAGE_BITS, (number + 1) << PAGE_BITS)
+            for number in sorted(numbers)
+        }
+
+    def segments(self):
+        return [(0, max(len(self.dense), len(self.image)))] + [
+            (number << PAGE_BITS, (number + 1) << PAGE_BITS)
+            for number in sorted(self.pages)
+        ]
+
+    def __len__(self):
+        return max(self.end, len(self.dense))
+
+    def snapshot(self):
+        self.owned = set()
+        return list(self.dense), dict(self.pages), self.end
+
+    def restore(self, snapshot):
+        dense, pages, self.end = snapshot
+        self.dense[:] = dense
+        self.pages = dict(pages)
+        self.owned = set()
+
+    def to_list(self):
+        return self.cells(0, self.end)
@@ -0,0 +1,69 @@
+import itertools
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# The function map_with_state runs, set once in each worker process.
+_worker_fn = None
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def imap_unordered(executor, fn, items, window):
+    """Yield (position, fn(item)) in completion order.
+
+    At most `window` tasks are in flight, so a huge or lazy `items` is
+    never submitted all at once; closing the generator cancels whatever is
+    still queued.
+    """
+    items = iter(items)
+    order = {}
+    number = 0
+    try:
+        for item in itertools.islice(items, window):
+            order[executor.submit(fn, item)] = number
+            number += 1
+
+        while order:
+            done, _ = wait(order, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield order.pop(future), future.result()
+
+            for item in itertools.islice(items, len(done)):
+                order[executor.submit(fn, item)] = number
+                number += 1
+    finally:
+        for future in order:
+            future.cancel()
+
+
+def _set_worker_fn(fn):
+    global _worker_fn
+    _worker_fn = fn
+
+
+def _call_worker_fn(item):
+    return _worker_fn(item)
+
+
+def map_with_state(processes, fn, items):
+    """Yield (position, fn(item)) in completion order from a pool of
+    `processes` worker processes.
+
+    `fn` is typically a functools.partial binding the program and other
+    arguments shared by every item; it is handed to each worker once, via
+    the pool initializer, so tasks only carry their item. Closing the
+    generator cancels queued items and shuts the pool down without waiting.
+    """
+    executor = ProcessPoolExecutor(
+        processes, initializer=_set_worker_fn, initargs=(fn,),
+    )
+    try:
+        yield from imap_unordered(executor, _call_worker_fn, items, 2 * processes)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,134 @@
+import time
+
+from .instructions import MNEMONICS
+
+
+class Profiler:
+    """Execution profile of a Computer, filled in by the interpreter.
+
+    Counts how often each address is executed, how often each opcode runs,
+    and which backward jumps are taken (a backward jump target is a loop
+    head). Every input/output instruction closes an I/O interval recording
+    the instructions and seconds spent since the previous one; time spent
+    suspended between runs is not counted.
+
+    Pass one as ``Computer(profiler=Profiler())``. A Computer without a
+    profiler pays a single check per instruction.
+    """
+
+    def __init__(self):
+        self.addresses = {}
+        self.opcodes = {}
+        self.jumps = {}
+        self.intervals = []
+        self.previous = None
+        self.instructions = 0
+        self.busy = 0.0
+        self.started = None
+
+    def start(self):
+        self.started = time.perf_counter()
+
+    def stop(self):
+        if self.started is not None:
+            self.busy += time.perf_counter() - self.started
+            self.started = None
+
+    def record(self, index, word):
+        opcode = word % 100
+        previous = self.previous
+        if index == previous and opcode == 3:
+            # Resuming an input that suspended the last run: it was
+            # counted (and closed its interval) when it was first reached.
+            return
+
+        self.addresses[index] = self.addresses.get(index, 0) + 1
+        self.opcodes[opcode] = self.opcodes.get(opcode, 0) + 1
+
+        if previous is not None and index <= previous:
+            edge = (previous, index)
+            self.jumps[edge] = self.jumps.get(edge, 0) + 1
+        self.previous = index
+
+        self.instructions += 1
+        if opcode == 3 or opcode == 4:
+            now = time.perf_counter()
+            self.intervals.append((
+                MNEMONICS[opcode],
+                index,
+                self.instructions,
+                self.busy + now - self.started,
+            ))
+            self.instructions = 0
+            self.busy = 0.0
+            self.started = now
+
+    def loops(self):
+        """Hot loops as (head, tail, iterations), most iterated first.
+
+        A loop is a backward jump from `tail` to `head`; `iterations`
+        counts how often that jump was taken.
+        """
+        loops = [(head, tail, count) for (tail, head), count in self.jumps.items()]
+        loops.sort(key=lambda loop: (-loop[2], loop[0]))
+        return loops
+
+    def stack(self, address):
+        """Loop nest around `address`, outermost first."""
+        frames = [
+            (head, tail) for (tail, head) in self.jumps if head <= address <= tail
+        ]
+        frames.sort(key=lambda frame: (frame[0] - frame[1], frame[0]))
+        return ['loop@%d' % head for head, _ in frames]
+
+    def report(self, program=None, top=20):
+        """Human readable summary, hottest entries first.
+
+        With `program` (a Memory or list) each hot address also shows the
+        mnemonic of the instruction that ran there.
+        """
+        total = sum(self.opcodes.values())
+        lines = ['%d instructions executed' % total, '', 'opcodes:']
+        for opcode, count in sorted(self.opcodes.items(), key=lambda item: -item[1]):
+            lines.append('  %-5s %10d  %5.1f%%' % (
+                MNEMONICS.get(opcode, opcode), count, 100.0 * count / total,
+            ))
+
+        lines.extend(['', 'addresses:'])
+        hottest = sorted(self.addresses.items(), key=lambda item: (-item[1], item[0]))
+        for address, count in hottest[:top]:
+            name = ''
+            if program is not None:
+                name = MNEMONICS.get(program[address] % 100, '?')
+            lines.append('  %6d %-5s %10d' % (address, name, count))
+
+        lines.extend(['', 'loops:'])
+        for head, tail, count in self.loops()[:top]:
+            lines.append('  %6d..%-6d %10d' % (head, tail, count))
+
+        lines.extend(['', 'io intervals:'])
+        for kind, address, instructions, seconds in self.intervals[:top]:
+            lines.append('  %-4s @%-6d %10d instructions %10.6fs' % (
+                kind, address, instructions, seconds,
+            ))
+        if len(self.intervals) > top:
+            lines.append('  ... %d more' % (len(self.intervals) - top))
+        return '\n'.join(lines)
+
+    def folded(self, program=None):
+        """Folded stacks for flamegraph.pl / speedscope, one line per address.
+
+        Frames are the loops around an address (see stack()) followed by
+        the address itself; the sample count is its execution count.
+        """
+        lines = []
+        for address, count in sorted(self.addresses.items()):
+            frame = '%d' % address
+            if program is not None:
+                frame = '%d:%s' % (address, MNEMONICS.get(program[address] % 100, '?'))
+            lines.append('%s %d' % (';'.join(['intcode'] + self.stack(address) + [frame]), count))
+        return '\n'.join(lines) + '\n'
+
+    def write_folded(self, path, program=None):
+        with open(path, 'w') as file:
+            file.write(self.folded(program))
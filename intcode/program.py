@@ -0,0 +1,56 @@
+import mmap
+import struct
+
+from .cells import pack_cells, unpack_cells
+
+# Binary program file: this header, then one pack_cells section. The cells
+# start 24 bytes in, so the file can be mapped and read as int64 in place.
+MAGIC = b'ICPG'
+VERSION = 1
+HEADER = struct.Struct('<4sHH')
+
+
+def parse_opcodes(input_str):
+    return [int(x) for x in input_str.strip().split(',')]
+
+
+def dump_program(codes):
+    return HEADER.pack(MAGIC, VERSION, 0) + pack_cells(codes)
+
+
+def parse_program(data):
+    """Decode dump_program() bytes (or any buffer, e.g. an mmap)."""
+    magic, version, _ = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('Not a binary Intcode program')
+    if version != VERSION:
+        raise ValueError('Unsupported program version %s' % version)
+
+    codes, _ = unpack_cells(memoryview(data), HEADER.size)
+    return codes
+
+
+def is_binary_program(path):
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def load_binary_program(path):
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return parse_program(mapped)
+
+
+def load_program(path):
+    """Load a program from comma-separated text or the binary format."""
+    if is_binary_program(path):
+        return load_binary_program(path)
+    with open(path) as f:
+        return parse_opcodes(f.read())
+
+
+def convert_program(source, target):
+    """Write the program in `source` (text or binary) to `target` as binary."""
+    with open(target, 'wb') as f:
+        f.write(dump_program(load_program(source)))
+
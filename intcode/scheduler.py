@@ -0,0 +1,79 @@
+from collections import deque
+
+from .channels import Sink
+from .computer import HALTED, OUT_OF_BUDGET, TIMED_OUT
+
+DEADLOCKED = 'deadlocked'
+
+
+class Tee(Sink):
+    """Output channel that copies every value onto each of `targets`,
+    for fanning one machine's output out to several readers."""
+
+    def __init__(self, *targets):
+        super().__init__(self.broadcast)
+        self.targets = targets
+
+    def broadcast(self, value):
+        for target in self.targets:
+            target.append(value)
+
+    def __reduce__(self):
+        return type(self), self.targets
+
+
+def downstream(channel):
+    return getattr(channel, 'targets', (channel,))
+
+
+def is_runnable(computer):
+    return not computer.terminated and (not computer.waiting or bool(computer.inputs))
+
+
+class Scheduler:
+    """Runs a network of Computers wired together by shared channels.
+
+    Only machines that can make progress are resumed: a machine that
+    blocked on an empty input channel is woken again only once a producer
+    writes to that channel. Any topology works (chains, rings, fan-in via a
+    shared channel, fan-out via Tee).
+    """
+
+    def __init__(self, computers):
+        self.computers = list(computers)
+        self.consumers = {}
+        for computer in self.computers:
+            self.consumers.setdefault(id(computer.inputs), []).append(computer)
+        self.resumes = 0
+        self.status = None
+
+    def blocked(self):
+        return [computer for computer in self.computers if not computer.terminated]
+
+    def run(self):
+        """Run until every machine halts (HALTED), every machine left is
+        waiting on input nobody will provide (DEADLOCKED), or one machine
+        runs out of its budget or timeout (its stop_reason)."""
+        ready = deque(computer for computer in self.computers if is_runnable(computer))
+        queued = {id(computer) for computer in ready}
+
+        while ready:
+            computer = ready.popleft()
+            queued.discard(id(computer))
+
+            computer.run()
+            self.resumes += 1
+            if computer.stop_reason in (OUT_OF_BUDGET, TIMED_OUT):
+                # The network stops with that machine; it and the rest stay
+                # resumable by calling run() again.
+                self.status = computer.stop_reason
+                return self.status
+
+            for channel in downstream(computer.outputs):
+                for consumer in self.consumers.get(id(channel), ()):
+                    if id(consumer) not in queued and is_runnable(consumer):
+                        ready.append(consumer)
+                        queued.add(id(consumer))
+
+        self.status = DEADLOCKED if self.blocked() else HALTED
+        return self.status
@@ -0,0 +1,104 @@
+import functools
+import itertools
+import os
+
+from .computer import OUT_OF_BUDGET, Computer
+from .memory import CowMemory, Memory
+from .pool import batched, map_with_state
+
+
+class MemoryEquals:
+    """Search predicate: the cell at `address` holds `value` after the run."""
+
+    def __init__(self, address, value):
+        self.address = address
+        self.value = value
+
+    def __call__(self, computer):
+        return computer.memory.read(self.address) == self.value
+
+
+def run_candidate(program, addresses, values, inputs=None, budget=None):
+    # Each candidate is a copy-on-write fork of the shared program image,
+    # so only the pages it writes to are copied.
+    memory = program.fork() if isinstance(program, CowMemory) else CowMemory(program)
+    for address, value in zip(addresses, values):
+        memory.write(address, value)
+
+    computer = Computer(memory=memory, inputs=list(inputs or []), budget=budget)
+    computer.run()
+    return computer
+
+
+def check_batch(program, addresses, batch, predicate, inputs=None, budget=None):
+    if isinstance(program, Memory):
+        image = CowMemory.from_memory(program)
+    else:
+        image = CowMemory(program)
+    hits = []
+    for values in batch:
+        try:
+            computer = run_candidate(image, addresses, values, inputs, budget)
+        except (IndexError, ValueError):
+            # A bad candidate can corrupt the program into an invalid opcode
+            # or a negative address; that is simply not a match.
+            continue
+        if computer.stop_reason == OUT_OF_BUDGET:
+            # Nor is one that loops forever.
+            continue
+
+        if predicate(computer):
+            hits.append(values)
+    return hits
+
+
+def search(program, parameters, predicate, inputs=None, find_all=False,
+           processes=None, batch_size=256, budget=None):
+    """Run `program` once per combination of parameter values.
+
+    `parameters` maps a memory address to the values to try there (e.g.
+    ``{1: range(100), 2: range(100)}`` for day02's noun and verb), and
+    `predicate` is called with each finished Computer. Returns the first
+    matching tuple of values found, or None; with `find_all` returns every
+    match in candidate order.
+
+    Candidates are checked in batches across a process pool, so
+    `predicate` must be picklable (see MemoryEquals). With processes=0
+    everything runs in this process. Once a match is found no further
+    batches are started and queued ones are cancelled. With `budget`, a
+    candidate still running after that many instructions is dropped.
+    """
+    addresses = tuple(parameters)
+    candidates = itertools.product(*parameters.values())
+    batches = batched(candidates, batch_size)
+
+    if processes == 0:
+        matches = []
+        for batch in batches:
+            hits = check_batch(program, addresses, batch, predicate, inputs, budget)
+            if hits and not find_all:
+                return hits[0]
+            matches.extend(hits)
+        return matches if find_all else None
+
+    processes = processes or os.cpu_count()
+    check = functools.partial(
+        check_batch, list(program), addresses,
+        predicate=predicate, inputs=inputs, budget=budget,
+    )
+
+    matches = []
+    results = map_with_state(processes, check, batches)
+    try:
+        for number, hits in results:
+            if hits and not find_all:
+                return hits[0]
+            matches.append((number, hits))
+    finally:
+        results.close()
+
+    if not find_all:
+        return None
+
+    matches.sort()
+    return [values for _, hits in matches for values in hits]
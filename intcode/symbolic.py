@@ -0,0 +1,219 @@
+import itertools
+
+from .instructions import ModeEnum, decode
+
+
+class Polynomial:
+    """Integer polynomial over named symbols.
+
+    Terms map a monomial (sorted tuple of symbol names, repeated for powers)
+    to its coefficient; the empty monomial is the constant term.
+    """
+
+    def __init__(self, terms=None):
+        self.terms = {
+            monomial: coefficient
+            for monomial, coefficient in (terms or {}).items()
+            if coefficient
+        }
+
+    @classmethod
+    def constant(cls, value):
+        return cls({(): value})
+
+    @classmethod
+    def symbol(cls, name):
+        return cls({(name,): 1})
+
+    @classmethod
+    def lift(cls, value):
+        if isinstance(value, Polynomial):
+            return value
+        return cls.constant(value)
+
+    def __add__(self, other):
+        terms = dict(self.terms)
+        for monomial, coefficient in Polynomial.lift(other).terms.items():
+            terms[monomial] = terms.get(monomial, 0) + coefficient
+        return Polynomial(terms)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return self * -1
+
+    def __sub__(self, other):
+        return self + -Polynomial.lift(other)
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __mul__(self, other):
+        terms = {}
+        for (m_1, c_1), (m_2, c_2) in itertools.product(
+            self.terms.items(), Polynomial.lift(other).terms.items()
+        ):
+            monomial = tuple(sorted(m_1 + m_2))
+            terms[monomial] = terms.get(monomial, 0) + c_1 * c_2
+        return Polynomial(terms)
+
+    __rmul__ = __mul__
+
+    def __eq__(self, other):
+        return self.terms == Polynomial.lift(other).terms
+
+    def is_constant(self):
+        return all(not monomial for monomial in self.terms)
+
+    def value(self):
+        if not self.is_constant():
+            raise ValueError('%s depends on symbols' % self)
+        return self.terms.get((), 0)
+
+    def symbols(self):
+        return {name for monomial in self.terms for name in monomial}
+
+    def evaluate(self, values):
+        total = 0
+        for monomial, coefficient in self.terms.items():
+            for name in monomial:
+                coefficient *= values[name]
+            total += coefficient
+        return total
+
+    def split_linear(self, name):
+        """Return (a, b) with self == a * name + b, or None if not linear."""
+        a, b = {}, {}
+        for monomial, coefficient in self.terms.items():
+            count = monomial.count(name)
+            if count > 1:
+                return None
+            if count:
+                rest = list(monomial)
+                rest.remove(name)
+                a[tuple(rest)] = coefficient
+            else:
+                b[monomial] = coefficient
+        return Polynomial(a), Polynomial(b)
+
+    def __str__(self):
+        if not self.terms:
+            return '0'
+
+        parts = []
+        for monomial in sorted(self.terms, key=lambda m: (-len(m), m)):
+            coefficient = self.terms[monomial]
+            if not monomial:
+                parts.append(str(coefficient))
+            elif coefficient == 1:
+                parts.append('*'.join(monomial))
+            else:
+                parts.append('*'.join((str(coefficient),) + monomial))
+        return ' + '.join(parts).replace('+ -', '- ')
+
+    def __repr__(self):
+        return 'Polynomial(%s)' % self
+
+
+def run_symbolic(program, symbols):
+    """Run an add/multiply-only (day02 style) program on symbolic cells.
+
+    `symbols` maps addresses to symbol names, e.g. ``{1: 'noun', 2: 'verb'}``.
+    Returns the final memory as a list of Polynomials. A value read through
+    a symbolic address has no closed form and is left as None; that is fine
+    as long as it is overwritten before anything depends on it.
+
+    Raises ValueError if the program uses any other opcode, or if an
+    instruction, write address or read address needs a cell that is not
+    a known constant.
+    """
+    memory = [Polynomial.constant(value) for value in program]
+    for address, name in symbols.items():
+        memory[address] = Polynomial.symbol(name)
+
+    def concrete(address):
+        if memory[address] is None:
+            raise ValueError('Cell %s has no closed form' % address)
+        return memory[address].value()
+
+    def operand(address, mode):
+        if mode == ModeEnum.IMMEDIATE_MODE:
+            return memory[address]
+        if mode != ModeEnum.POSITION_MODE:
+            raise ValueError('Mode %s is not supported symbolically' % mode)
+
+        pointer = memory[address]
+        if pointer is None or not pointer.is_constant():
+            return None
+        return memory[pointer.value()]
+
+    index = 0
+    while True:
+        opcode, mode_1, mode_2, mode_3 = decode(concrete(index))
+
+        if opcode == 99:
+            return memory
+
+        if opcode not in (1, 2) or mode_3 != ModeEnum.POSITION_MODE:
+            raise ValueError(
+                'Instruction %s at address %s is not supported symbolically'
+                % (memory[index], index)
+            )
+
+        var_1 = operand(index + 1, mode_1)
+        var_2 = operand(index + 2, mode_2)
+        if var_1 is None or var_2 is None:
+            value = None
+        elif opcode == 1:
+            value = var_1 + var_2
+        else:
+            value = var_1 * var_2
+
+        memory[concrete(index + 3)] = value
+        index += 4
+
+
+def iter_solutions(expression, target, domains):
+    names = sorted(domains)
+    solved, split = None, None
+    for name in names:
+        split = expression.split_linear(name)
+        if split is not None and split[0].terms:
+            solved = name
+            break
+
+    free = [name for name in names if name != solved]
+    allowed = set(domains[solved]) if solved is not None else None
+    for values in itertools.product(*(domains[name] for name in free)):
+        values = dict(zip(free, values))
+
+        if solved is None:
+            if expression.evaluate(values) == target:
+                yield values
+            continue
+
+        a = split[0].evaluate(values)
+        b = split[1].evaluate(values)
+        if a == 0:
+            candidates = domains[solved] if b == target else ()
+        elif (target - b) % a == 0 and (target - b) // a in allowed:
+            candidates = ((target - b) // a,)
+        else:
+            candidates = ()
+
+        for value in candidates:
+            yield dict(values, **{solved: value})
+
+
+def solve(expression, target, domains, find_all=False):
+    """Find symbol values in `domains` for which expression == target.
+
+    `domains` maps every symbol to the values it may take. If the
+    expression is linear in some symbol, that symbol is solved for directly
+    rather than enumerated, so a noun/verb pair costs one pass over nouns.
+    Returns the first solution as a dict (or None), or a list of all of them.
+    """
+    solutions = iter_solutions(expression, target, domains)
+    if find_all:
+        return list(solutions)
+    return next(solutions, None)
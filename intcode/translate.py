@@ -0,0 +1,303 @@
+from .instructions import INSTRUCTION_WIDTHS, ModeEnum, decode
+
+CONTINUE = 0
+WAITING = 1
+HALTED = 2
+UNTRANSLATABLE = 3
+# The block wrote over one of its own instructions it hasn't run yet; the
+# rest of the block is left to the interpreter.
+INVALIDATED = 4
+# The memory backend replaced its dense storage (see ArrayMemory); blocks
+# bound to the old one must be dropped.
+RELOAD = -1
+
+MAX_BLOCK_LENGTH = 64
+# A block start invalidated more often than this is treated as
+# self-modifying hot code and left to the interpreter.
+MAX_RETRANSLATIONS = 8
+
+BINARY_OPERATORS = {1: '%s + %s', 2: '%s * %s', 7: 'int(%s < %s)', 8: 'int(%s == %s)'}
+WIDTHS = INSTRUCTION_WIDTHS
+
+# Compiled block code shared by every Translator, keyed by start address
+# and the words the block covers, which is all its source depends on. Many
+# short-lived Computers run the same program (day02, day07), and generating
+# and compiling a block costs far more than the run of a typical one.
+# CACHED_ENDS lists the block ends seen per start, to find the words to
+# look up without generating the source first.
+CODE_CACHE = {}
+CACHED_ENDS = {}
+MAX_CACHED_BLOCKS = 4096
+
+
+def read_expression(raw, mode):
+    if mode == ModeEnum.IMMEDIATE_MODE:
+        return repr(raw)
+    if mode == ModeEnum.POSITION_MODE:
+        return '(dense[%d] if 0 <= %d < size else read(%d))' % (raw, raw, raw)
+    if mode == ModeEnum.RELATIVE_MODE:
+        return '(dense[rb + %d] if 0 <= rb + %d < size else read(rb + %d))' % (raw, raw, raw)
+    raise ValueError('Unknown mode %s' % mode)
+
+
+def write_lines(raw, mode, value, next_index):
+    target = '%d' % raw if mode == ModeEnum.POSITION_MODE else 'rb + %d' % raw
+    return [
+        't = %s' % target,
+        'v = %s' % value,
+        'if 0 <= t < size:',
+        '    try:',
+        '        dense[t] = v',
+        '    except OverflowError:',
+        '        write(t, v)',
+        '        return %d, rb, %d' % (next_index, RELOAD),
+        'else:',
+        '    write(t, v)',
+        '    if memory.dense is not dense:',
+        '        return %d, rb, %d' % (next_index, RELOAD),
+        '    size = len(dense)',
+        # A write into translated code drops the affected blocks. Only one
+        # into the part of this block still to run has to stop it; writes
+        # to instructions already run (day02 overwrites its own operands)
+        # don't. BLOCK_END is filled in once the block's end is known.
+        'if t in code:',
+        '    invalidate(t)',
+        'if %d <= t < BLOCK_END:' % next_index,
+        '    return %d, rb, %d' % (next_index, INVALIDATED),
+    ]
+
+
+def translate_block(memory, start):
+    """Generate Python source for the basic block starting at `start`.
+
+    Modes and operand addresses are baked into the code. The block runs up
+    to and including the next jump, input or halt (or MAX_BLOCK_LENGTH
+    instructions), and returns (next index, relative base, status). Returns
+    the source lines and the end address of the instructions it covers.
+    """
+    lines, end = block_lines(memory, start)
+    return [line.replace('BLOCK_END', '%d' % end) for line in lines], end
+
+
+def block_lines(memory, start):
+    lines = []
+    index = start
+    for _ in range(MAX_BLOCK_LENGTH):
+        word = memory.read(index)
+        try:
+            opcode, mode_1, mode_2, mode_3 = decode(word)
+        except ValueError:
+            opcode = None
+
+        # Stop in front of anything that isn't a valid instruction (yet: the
+        # block may patch it). An empty block is left for the interpreter to
+        # report.
+        width = WIDTHS.get(opcode)
+        if width is None:
+            status = UNTRANSLATABLE if index == start else CONTINUE
+            lines.append('return %d, rb, %d' % (index, status))
+            return lines, index
+
+        raw = memory.cells(index + 1, index + width)
+        next_index = index + width
+        lines.append('# %d: %s' % (index, [word] + raw))
+
+        if opcode in BINARY_OPERATORS:
+            value = BINARY_OPERATORS[opcode] % (
+                read_expression(raw[0], mode_1),
+                read_expression(raw[1], mode_2),
+            )
+            lines.extend(write_lines(raw[2], mode_3, value, next_index))
+
+        elif opcode == 4:
+            lines.append('outputs.append(%s)' % read_expression(raw[0], mode_1))
+
+        elif opcode == 9:
+            lines.append('rb += %s' % read_expression(raw[0], mode_1))
+
+        elif opcode == 3:
+            lines.append('if not inputs and not inputs.refill():')
+            lines.append('    return %d, rb, %d' % (index, WAITING))
+            lines.extend(write_lines(raw[0], mode_1, 'inputs.popleft()', next_index))
+            lines.append('return %d, rb, %d' % (next_index, CONTINUE))
+            return lines, next_index
+
+        elif opcode in (5, 6):
+            condition = read_expression(raw[0], mode_1)
+            lines.append('if %s%s:' % ('' if opcode == 5 else 'not ', condition))
+            lines.append('    return %s, rb, %d' % (read_expression(raw[1], mode_2), CONTINUE))
+            lines.append('return %d, rb, %d' % (next_index, CONTINUE))
+            return lines, next_index
+
+        elif opcode == 99:
+            lines.append('return %d, rb, %d' % (next_index, HALTED))
+            return lines, next_index
+
+        index = next_index
+
+    lines.append('return %d, rb, %d' % (index, CONTINUE))
+    return lines, index
+
+
+class Block:
+    def __init__(self, start, end, words, function, source):
+        self.start = start
+        self.end = end
+        self.words = words
+        self.function = function
+        self.source = source
+
+
+class Translator:
+    """Basic-block translation tier for a Computer.
+
+    Blocks are compiled on first visit and cached by start address. Every
+    translated write is checked against the cells covered by cached blocks;
+    hitting one drops those blocks so they are retranslated from the new
+    memory on their next visit. Blocks are also re-checked against memory
+    once per run, which catches changes made between runs.
+    """
+
+    def __init__(self, computer):
+        self.computer = computer
+        self.blocks = {}
+        self.code = {}
+        self.retranslations = {}
+        self.memory = None
+        self.dense = None
+
+    def flush(self):
+        self.blocks.clear()
+        self.code.clear()
+
+    def invalidate(self, address):
+        starts = self.code.pop(address, None)
+        if not starts:
+            return False
+
+        for start in starts:
+            block = self.blocks.pop(start, None)
+            if block is None:
+                continue
+            self.retranslations[start] = self.retranslations.get(start, 0) + 1
+            for cell in range(block.start, block.end):
+                owners = self.code.get(cell)
+                if owners is not None:
+                    owners.discard(start)
+                    if not owners:
+                        del self.code[cell]
+        return True
+
+    def compile(self, start):
+        memory = self.computer.memory
+        cached = None
+        for end in CACHED_ENDS.get(start, ()):
+            words = memory.cells(start, end)
+            cached = CODE_CACHE.get((start, tuple(words)))
+            if cached is not None:
+                break
+
+        if cached is None:
+            lines, end = translate_block(memory, start)
+            words = memory.cells(start, end)
+            source = 'def block(rb, size, inputs, outputs, memory=memory, dense=dense, read=read, write=write, code=code, invalidate=invalidate):\n'
+            source += ''.join('    %s\n' % line for line in lines)
+            cached = (compile(source, '<intcode block %d>' % start, 'exec'), source)
+            # An empty block (invalid first word) isn't cached: the word may
+            # be patched into an instruction later.
+            if end > start:
+                if len(CODE_CACHE) >= MAX_CACHED_BLOCKS:
+                    CODE_CACHE.clear()
+                    CACHED_ENDS.clear()
+                CODE_CACHE[start, tuple(words)] = cached
+                CACHED_ENDS.setdefault(start, set()).add(end)
+
+        code, source = cached
+        namespace = {
+            'memory': memory,
+            'dense': memory.dense,
+            'read': memory.read,
+            'write': memory.write,
+            'code': self.code,
+            'invalidate': self.invalidate,
+        }
+        exec(code, namespace)
+
+        block = Block(start, end, words, namespace['block'], source)
+        if end > start:
+            self.blocks[start] = block
+            for cell in range(start, end):
+                self.code.setdefault(cell, set()).add(start)
+        return block
+
+    def run(self):
+        computer = self.computer
+        if computer.terminated:
+            return
+
+        memory = computer.memory
+        if memory is not self.memory or memory.dense is not self.dense:
+            self.flush()
+            self.memory = memory
+            self.dense = memory.dense
+
+        dense = memory.dense
+        blocks = self.blocks
+        inputs = computer.inputs
+        outputs = computer.outputs
+        index = computer.index
+        rb = computer.relative_base
+        checked = set()
+        status = CONTINUE
+
+        while status <= CONTINUE:
+            if status == RELOAD:
+                self.flush()
+                dense = self.dense = memory.dense
+
+            block = blocks.get(index)
+            if block is not None and index not in checked:
+                checked.add(index)
+                if memory.cells(block.start, block.end) != block.words:
+                    self.invalidate(index)
+                    block = None
+
+            if block is None:
+                if self.retranslations.get(index, 0) > MAX_RETRANSLATIONS:
+                    status = UNTRANSLATABLE
+                    break
+                block = self.compile(index)
+                checked.add(index)
+
+            index, rb, status = block.function(rb, len(dense), inputs, outputs)
+            if status == INVALIDATED:
+                # Finish the block on the interpreter rather than compile
+                # a new one from the middle of it; its start is translated
+                # afresh if control comes back to it. The interpreter's
+                # writes aren't tracked, so cached blocks are re-checked
+                # against memory on their next visit.
+                computer.index = index
+                computer.relative_base = rb
+                computer.interpret(one_block=True)
+                index = computer.index
+                rb = computer.relative_base
+                checked.clear()
+                if computer.terminated:
+                    status = HALTED
+                elif computer.waiting:
+                    status = WAITING
+                elif memory.dense is not dense:
+                    status = RELOAD
+                else:
+                    status = CONTINUE
+
+        computer.index = index
+        computer.relative_base = rb
+        computer.waiting = status == WAITING
+        computer.terminated = status == HALTED
+
+        if status == UNTRANSLATABLE:
+            # Hand the rest of this run to the interpreter. Its writes are not
+            # tracked, so nothing cached can be trusted afterwards.
+            self.flush()
+            computer.interpret()